@@ -0,0 +1,88 @@
+"""
+Modul benchmarking.
+Wspólne funkcje skryptów benchmark.py z projektów spectral_clustering i pandas_sql:
+pomiar czasu i pamięci, porównanie wyników dwóch uruchomień oraz wspólne opcje wiersza poleceń.
+Skrypty różnią się tylko siatką pomiarów i statystyką czasu (minimum lub mediana).
+
+Przykład użycia:
+    result, times, memory = measure(spectral_clustering, X, 3, 5, repeat=5)
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Domyślny próg względnego wzrostu czasu lub pamięci uznawany za regresję
+REGRESSION_THRESHOLD = 1.2
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """
+    Funkcja mierzy czasy repeat wykonań func(*args, **kwargs) oraz maksymalne zużycie pamięci (w MB)
+    w osobnym wykonaniu ze śledzeniem alokacji, tak aby narzut tracemalloc nie wpływał na pomiar czasu.
+    tracemalloc śledzi tylko alokacje Pythona i numpy (np. dla SQLite mierzona jest jedynie pamięć wyniku).
+    Zwraca wynik funkcji, tablicę czasów w sekundach i pamięć w MB.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, np.array(times), peak / 2 ** 20
+
+
+def compare_results(old, new, key_columns, time_column="time", threshold=REGRESSION_THRESHOLD):
+    """
+    Funkcja porównuje dwie ramki wyników (lub ścieżki do plików CSV) benchmarku.
+    Pomiary są łączone po kolumnach key_columns, a czas odczytywany jest z kolumny time_column.
+    Zwraca ramkę ze stosunkami czasu i pamięci (nowe / stare) dla wspólnych pomiarów
+    oraz kolumną regression oznaczającą przekroczenie progu threshold.
+    """
+    if isinstance(old, str):
+        old = pd.read_csv(old)
+    if isinstance(new, str):
+        new = pd.read_csv(new)
+
+    # Wartości brakujące (np. n_jobs=None) nie łączą się w merge, więc zamieniamy je na tekst
+    old = old.astype({c: str for c in key_columns})
+    new = new.astype({c: str for c in key_columns})
+
+    df = old.merge(new, on=key_columns, suffixes=("_old", "_new"))
+    df["time_ratio"] = df[time_column + "_new"] / df[time_column + "_old"]
+    df["memory_ratio"] = df["peak_memory_mb_new"] / df["peak_memory_mb_old"]
+    df["regression"] = (df["time_ratio"] > threshold) | (df["memory_ratio"] > threshold)
+    return df
+
+
+def add_common_arguments(parser, repeat=3):
+    """Funkcja dodaje do parsera argparse opcje wspólne dla wszystkich benchmarków."""
+    parser.add_argument("--repeat", type=int, default=repeat, help="liczba powtórzeń pomiaru czasu")
+    parser.add_argument("-o", "--output", default="benchmark_results.csv", help="plik wynikowy CSV")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="porównanie dwóch plików wyników")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="próg regresji")
+
+
+def print_comparison(args, key_columns, time_column="time", shown_columns=None):
+    """
+    Funkcja porównuje pliki wyników z opcji --compare i wypisuje stosunki czasu i pamięci
+    dla kolumn shown_columns (domyślnie key_columns) oraz liczbę regresji.
+    """
+    df = compare_results(args.compare[0], args.compare[1], key_columns, time_column, args.threshold)
+    shown_columns = shown_columns if shown_columns is not None else key_columns
+    print(df[shown_columns + ["time_ratio", "memory_ratio", "regression"]].to_string(index=False))
+    print("Liczba regresji: {0}".format(df["regression"].sum()))
+    return df
+
+
+def save_results(df, output):
+    """Funkcja zapisuje wyniki benchmarku do pliku CSV output i wypisuje je."""
+    df.to_csv(output, index=False)
+    print(df.to_string(index=False))
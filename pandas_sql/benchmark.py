@@ -0,0 +1,192 @@
+"""
+Modul benchmark.
+Modul porównuje zapytania SQL (SQLite) z ich implementacjami w pandas: sprawdza, czy oba
+silniki zwracają te same wiersze (bez względu na kolejność), oraz mierzy medianę i percentyle
+czasu wykonania i maksymalne zużycie pamięci dla danych przeskalowanych o podane czynniki
+(próbka tabel dla czynników mniejszych od 1, powielenie tabel dla całkowitych czynników większych od 1).
+Wyniki zapisywane są do pliku CSV, który można porównać z wynikami poprzedniego uruchomienia.
+
+Wspólne funkcje benchmarków pochodzą z modułu benchmarking w katalogu głównym repozytorium,
+który musi być w PYTHONPATH.
+
+Przykłady użycia:
+    PYTHONPATH=.. python benchmark.py --factors 0.25 0.5 1 2 --repeat 7 -o wyniki.csv
+    PYTHONPATH=.. python benchmark.py --compare stare.csv nowe.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmarking import measure, add_common_arguments, print_comparison, save_results
+from query_engine import QueryEngine, SQL_QUERIES, PANDAS_QUERIES, DATA_FOLDER
+from sqlite_loader import load_database, get_sql_dataframe
+
+# Kolumny identyfikujące pojedynczy pomiar przy porównywaniu wyników
+KEY_COLUMNS = ["query", "engine", "factor"]
+
+# Kolumny z identyfikatorami w tabelach, przesuwane przy powielaniu danych
+ID_COLUMNS = {
+    "Badges": ["Id", "UserId"],
+    "Comments": ["Id", "PostId", "UserId"],
+    "PostLinks": ["Id", "PostId", "RelatedPostId"],
+    "Posts": ["Id", "ParentId", "AcceptedAnswerId", "OwnerUserId", "LastEditorUserId"],
+    "Tags": ["Id", "ExcerptPostId", "WikiPostId"],
+    "Users": ["Id", "AccountId"],
+    "Votes": ["Id", "PostId", "UserId"],
+}
+
+# Zarejestrowane pary zapytań: nazwa -> słownik z zapytaniem SQL (sql), funkcją pandas (pandas),
+# kolumną sortowania (order_by) i informacją, czy wynik jest ograniczony przez LIMIT (limited)
+QUERY_PAIRS = {}
+
+
+def register_query(name, sql, func, order_by=None, limited=False):
+    """
+    Funkcja rejestruje zapytanie SQL sql i jego implementację func(engine) w pandas.
+    Dla zapytań z ORDER BY order_by DESC ... LIMIT (limited=True) wiersze o wartości order_by
+    równej ostatniej wartości wyniku SQL mogą być różne w obu silnikach i porównywana jest tylko ich liczba.
+    """
+    QUERY_PAIRS[name] = {"sql": sql, "pandas": func, "order_by": order_by, "limited": limited}
+
+
+register_query("query_1", SQL_QUERIES[1], PANDAS_QUERIES[1], "NumLinks")
+register_query("query_2", SQL_QUERIES[2], PANDAS_QUERIES[2], "FavoriteTotal", limited=True)
+register_query("query_3", SQL_QUERIES[3], PANDAS_QUERIES[3], "CommentsTotalScore", limited=True)
+register_query("query_4", SQL_QUERIES[4], PANDAS_QUERIES[4])
+register_query("query_5", SQL_QUERIES[5], PANDAS_QUERIES[5], "Difference")
+
+
+def _sorted_rows(df):
+    """Funkcja zwraca ramkę df z kolumnami kategorycznymi zamienionymi na zwykłe i wierszami posortowanymi."""
+    df = df.astype({column: object for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)})
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def frames_equal(df_sql, df_pd, order_by=None, limited=False):
+    """
+    Funkcja sprawdza, czy dwie ramki danych mają te same wiersze z dokładnością do ich kolejności
+    (oraz typów kolumn). Dla zapytań z LIMIT (limited=True) wiersze z ostatnią wartością
+    kolumny order_by w wyniku SQL (także NULL) są porównywane tylko co do liczby.
+    """
+    if list(df_sql.columns) != list(df_pd.columns) or df_sql.shape[0] != df_pd.shape[0]:
+        return False
+    if limited and df_sql.shape[0] > 0:
+        last = df_sql[order_by].iloc[-1]
+        sql_last = df_sql[order_by].isna() if pd.isna(last) else df_sql[order_by] == last
+        pd_last = df_pd[order_by].isna() if pd.isna(last) else df_pd[order_by] == last
+        if sql_last.sum() != pd_last.sum():
+            return False
+        df_sql, df_pd = df_sql[~sql_last], df_pd[~pd_last]
+    try:
+        pd.testing.assert_frame_equal(_sorted_rows(df_sql), _sorted_rows(df_pd), check_dtype=False,
+                                      check_categorical=False)
+    except AssertionError:
+        return False
+    return True
+
+
+def scale_tables(tables, factor, random_state=0):
+    """
+    Funkcja skaluje zbiór tabel o czynnik factor. Dla factor < 1 wybierana jest próbka
+    użytkowników i postów, a pozostałe tabele są ograniczane do wierszy odwołujących się do nich.
+    Dla całkowitego factor >= 1 tabele są powielane factor razy z przesuniętymi identyfikatorami.
+    """
+    if factor < 1:
+        tables = dict(tables)
+        tables["Users"] = tables["Users"].sample(frac=factor, random_state=random_state)
+        tables["Posts"] = tables["Posts"].sample(frac=factor, random_state=random_state)
+        users, posts = tables["Users"]["Id"], tables["Posts"]["Id"]
+        tables["Badges"] = tables["Badges"][tables["Badges"]["UserId"].isin(users)]
+        tables["Comments"] = tables["Comments"][tables["Comments"]["PostId"].isin(posts)]
+        tables["PostLinks"] = tables["PostLinks"][tables["PostLinks"]["PostId"].isin(posts)
+                                                  & tables["PostLinks"]["RelatedPostId"].isin(posts)]
+        tables["Votes"] = tables["Votes"][tables["Votes"]["PostId"].isin(posts)]
+        return {name: df.reset_index(drop=True) for name, df in tables.items()}
+
+    if factor != int(factor):
+        raise ValueError("Czynnik większy od 1 musi być liczbą całkowitą.")
+
+    offset = 1 + max(tables[name][column].max() for name, columns in ID_COLUMNS.items()
+                     for column in columns if column in tables.get(name, {}))
+    scaled = {}
+    for name, df in tables.items():
+        copies = []
+        for i in range(int(factor)):
+            copy = df.copy()
+            for column in ID_COLUMNS.get(name, []):
+                if column in copy:
+                    dtype = "float64" if copy[column].isna().any() else "int64"
+                    copy[column] = copy[column].astype(dtype) + i * offset
+            copies.append(copy)
+        scaled[name] = pd.concat(copies, ignore_index=True)
+    return scaled
+
+
+def run_benchmark(factors, queries=None, repeat=5, warm=False, folder=DATA_FOLDER, cache=False, random_state=0):
+    """
+    Funkcja wykonuje pomiary dla wszystkich zarejestrowanych (lub wybranych queries) par zapytań
+    na danych przeskalowanych o każdy z czynników factors.
+    Dla warm=False pamięć podręczna silnika pandas jest czyszczona przed każdym wykonaniem,
+    więc mierzony jest pełny koszt zapytania.
+    ------------------
+    return value:
+    results - ramka danych z kolumnami KEY_COLUMNS, posts (liczba wierszy Posts), rows (liczba wierszy wyniku),
+    equal (zgodność wyników obu silników), median, p90, p99 (czasy w s) i peak_memory_mb
+    """
+    base = QueryEngine().load(folder, cache=cache).tables
+    queries = queries if queries is not None else list(QUERY_PAIRS)
+    rows = []
+
+    for factor in factors:
+        tables = scale_tables(base, factor, random_state)
+        engine = QueryEngine(tables)
+        conn = load_database(tables)
+
+        for name in queries:
+            pair = QUERY_PAIRS[name]
+
+            def run_pandas():
+                if not warm:
+                    engine.invalidate()
+                return pair["pandas"](engine)
+
+            df_sql, sql_times, sql_mem = measure(get_sql_dataframe, pair["sql"], conn, repeat=repeat)
+            df_pd, pd_times, pd_mem = measure(run_pandas, repeat=repeat)
+            equal = frames_equal(df_sql, df_pd, pair["order_by"], pair["limited"])
+
+            for engine_name, df, times, mem in (("sql", df_sql, sql_times, sql_mem), ("pandas", df_pd, pd_times, pd_mem)):
+                rows.append(dict(query=name, engine=engine_name, factor=factor, posts=tables["Posts"].shape[0],
+                                 rows=df.shape[0], equal=equal, median=np.median(times),
+                                 p90=np.percentile(times, 90), p99=np.percentile(times, 99), peak_memory_mb=mem))
+
+    return pd.DataFrame(rows, columns=KEY_COLUMNS + ["posts", "rows", "equal", "median", "p90", "p99",
+                                                     "peak_memory_mb"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie zapytań SQL i pandas.")
+    parser.add_argument("--factors", type=float, nargs="+", default=[0.25, 0.5, 1, 2], help="czynniki skalowania danych")
+    parser.add_argument("--queries", nargs="+", default=None, help="nazwy zapytań (domyślnie wszystkie)")
+    parser.add_argument("--warm", action="store_true", help="bez czyszczenia pamięci podręcznej silnika pandas")
+    parser.add_argument("--folder", default=DATA_FOLDER, help="folder z danymi")
+    parser.add_argument("--cache", action="store_true", help="wczytanie danych z kolumnowej pamięci podręcznej")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno losowania próbek")
+    add_common_arguments(parser, repeat=5)
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(args, KEY_COLUMNS, "median")
+        return
+
+    df = run_benchmark(args.factors, args.queries, args.repeat, args.warm, args.folder, args.cache, args.seed)
+    save_results(df, args.output)
+    if not df["equal"].all():
+        print("Wyniki różnią się dla zapytań: {0}".format(", ".join(df.loc[~df["equal"], "query"].unique())))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Modul chunked_queries.
+Realizacja zapytań z modułu query_engine bez wczytywania całych tabel do pamięci.
+Tabele są czytane z plików CSV kawałkami po chunksize wierszy, tylko z potrzebnymi kolumnami,
+a warunki WHERE (np. PostTypeId == 1) są stosowane do każdego kawałka zaraz po wczytaniu.
+Agregaty częściowe z kolejnych kawałków są łączone w jeden wynik (stan zależy od liczby grup,
+a nie od liczby wierszy), a dla zapytań z ORDER BY ... LIMIT przechowywany jest tylko
+ograniczony kopiec najlepszych wierszy. Zużycie pamięci nie rośnie więc z rozmiarem tabel,
+za cenę kilku przejść po plikach.
+
+Przykład użycia:
+    wynik = CHUNKED_QUERIES[3]("travel_stackexchange_com", chunksize=10000)
+"""
+
+import heapq
+import os
+
+import pandas as pd
+
+from _profiling_compat import profile_stage
+
+# Folder z danymi serwisu travel.stackexchange.com
+DATA_FOLDER = "travel_stackexchange_com"
+
+# Domyślna liczba wierszy wczytywanych w jednym kawałku
+CHUNK_SIZE = 100000
+
+
+def read_chunks(name, columns, where=None, folder=DATA_FOLDER, chunksize=CHUNK_SIZE):
+    """
+    Funkcja zwraca kolejne kawałki tabeli name z kolumnami columns. Dla where (słownik:
+    kolumna -> wartość) zwracane są tylko wiersze spełniające wszystkie warunki równości.
+    """
+    where = where or {}
+    usecols = list(columns) + [column for column in where if column not in columns]
+    for chunk in pd.read_csv(os.path.join(folder, name + ".csv.gz"), compression="gzip", usecols=usecols,
+                             chunksize=chunksize):
+        for column, value in where.items():
+            chunk = chunk[chunk[column] == value]
+        yield chunk[list(columns)]
+
+
+def combine_partial(state, partial, func="sum"):
+    """
+    Funkcja łączy agregat częściowy partial (seria lub ramka indeksowana kluczami grup)
+    z dotychczasowym stanem state za pomocą funkcji func (np. sum, max).
+    """
+    if state is None:
+        return partial
+    both = pd.concat([state, partial])
+    return both.groupby(level=list(range(both.index.nlevels))).agg(func)
+
+
+def collect_rows(chunks, column, keys):
+    """Funkcja zwraca wiersze z kawałków chunks, dla których wartość kolumny column należy do keys."""
+    parts = [chunk[chunk[column].isin(keys)] for chunk in chunks]
+    return pd.concat(parts, ignore_index=True)
+
+
+class TopN:
+    """
+    Ograniczony kopiec przechowujący n wierszy o największych wartościach kolumny column
+    spośród wszystkich przekazanych ramek (zob. push()). Odpowiada ORDER BY column DESC LIMIT n.
+    """
+
+    def __init__(self, n, column, columns):
+        self.n = n
+        self.column = column
+        self.columns = list(columns)
+        self._position = self.columns.index(column)
+        self._heap = []
+        self._counter = 0
+
+    def push(self, df):
+        """Dodanie wierszy ramki df (z kolumnami columns), z której najpierw wybierane jest n najlepszych."""
+        for row in df[self.columns].nlargest(self.n, self.column).itertuples(index=False, name=None):
+            # Licznik rozstrzyga remisy, aby nie porównywać pozostałych wartości wierszy
+            item = (row[self._position], self._counter, row)
+            self._counter += 1
+            if len(self._heap) < self.n:
+                heapq.heappush(self._heap, item)
+            elif item[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def result(self):
+        """Zwraca ramkę danych z przechowywanymi wierszami posortowanymi malejąco."""
+        rows = [row for _, _, row in sorted(self._heap, key=lambda item: item[0], reverse=True)]
+        return pd.DataFrame(rows, columns=self.columns)
+
+
+@profile_stage()
+def chunked_query_1(folder=DATA_FOLDER, chunksize=CHUNK_SIZE):
+    """Zapytanie 1 (zob. query_engine.query_1()) wykonywane na kawałkach tabel."""
+    counts = None
+    for chunk in read_chunks("PostLinks", ["RelatedPostId"], folder=folder, chunksize=chunksize):
+        counts = combine_partial(counts, chunk.groupby("RelatedPostId").size())
+    counts = counts.rename("NumLinks")
+
+    parts = []
+    for chunk in read_chunks("Posts", ["Id", "Title"], {"PostTypeId": 1}, folder, chunksize):
+        parts.append(chunk.join(counts, on="Id", how="inner")[["Title", "NumLinks"]])
+    pd_result = pd.concat(parts).sort_values(by=["NumLinks"], ascending=False)
+    return pd_result.reset_index(drop=True)
+
+
+@profile_stage()
+def chunked_query_2(folder=DATA_FOLDER, chunksize=CHUNK_SIZE):
+    """Zapytanie 2 (zob. query_engine.query_2()) wykonywane na kawałkach tabel."""
+    # Przejście 1: suma, maksimum i liczba niepustych FavoriteCount dla każdego właściciela pytań
+    aggr = None
+    for chunk in read_chunks("Posts", ["OwnerUserId", "FavoriteCount"], {"PostTypeId": 1}, folder, chunksize):
+        partial = chunk.groupby("OwnerUserId")["FavoriteCount"].agg(["sum", "max", "count"])
+        aggr = combine_partial(aggr, partial, {"sum": "sum", "max": "max", "count": "sum"})
+    present = pd.concat([chunk["Id"] for chunk in read_chunks("Users", ["Id"], folder=folder, chunksize=chunksize)])
+    aggr = aggr[aggr.index.isin(present)]
+
+    # Kandydaci do pierwszej dziesiątki (z remisami), jak w query_engine.query_2()
+    totals = aggr["sum"].where(aggr["count"] > 0)
+    largest = totals.nlargest(10)
+    top = aggr.loc[(totals >= largest.min()) | (totals.isna() & (largest.shape[0] < 10)), ["max"]]
+    top = top.assign(FavoriteTotal=totals).rename(columns={"max": "MostFavoriteQuestionLikes"})
+
+    # Przejście 2: tytuły najlepszych pytań kandydatów
+    questions = collect_rows(read_chunks("Posts", ["OwnerUserId", "Title", "FavoriteCount"], {"PostTypeId": 1},
+                                         folder, chunksize), "OwnerUserId", top.index)
+    join1 = questions.join(top, on="OwnerUserId", how="inner")
+    no_likes = join1["MostFavoriteQuestionLikes"].isna() & ~join1["OwnerUserId"].duplicated()
+    join1 = join1[(join1["FavoriteCount"] == join1["MostFavoriteQuestionLikes"]) | no_likes]
+
+    users = collect_rows(read_chunks("Users", ["Id", "DisplayName", "Age", "Location"], folder=folder,
+                                     chunksize=chunksize), "Id", top.index)
+    join2 = join1.merge(users, left_on="OwnerUserId", right_on="Id")
+    pd_result = join2.rename(columns={"Title": "MostFavoriteQuestion"})[
+        ["DisplayName", "Age", "Location", "FavoriteTotal", "MostFavoriteQuestion", "MostFavoriteQuestionLikes"]]
+    pd_result = pd_result.sort_values(by=["FavoriteTotal"], ascending=False).head(10)
+    return pd_result.reset_index(drop=True)
+
+
+@profile_stage()
+def chunked_query_3(folder=DATA_FOLDER, chunksize=CHUNK_SIZE):
+    """Zapytanie 3 (zob. query_engine.query_3()) wykonywane na kawałkach tabel."""
+    # Przejście 1: właściciele pytań
+    owners = pd.concat([chunk.dropna().set_index("Id")["OwnerUserId"] for chunk in
+                        read_chunks("Posts", ["Id", "OwnerUserId"], {"PostTypeId": 1}, folder, chunksize)])
+
+    # Przejście 2: sumy Score komentarzy autorów pytań, tylko dla komentarzy spełniających warunek złączenia
+    scores = None
+    for chunk in read_chunks("Comments", ["PostId", "UserId", "Score"], folder=folder, chunksize=chunksize):
+        chunk = chunk[chunk["UserId"] == chunk["PostId"].map(owners)]
+        scores = combine_partial(scores, chunk.groupby("PostId")["Score"].sum())
+    scores = scores.rename("CommentsTotalScore")
+
+    # Przejście 3: tytuły, do wyniku trafia tylko 10 najlepszych wierszy
+    top = TopN(10, "CommentsTotalScore", ["Title", "CommentsTotalScore"])
+    for chunk in read_chunks("Posts", ["Id", "Title"], {"PostTypeId": 1}, folder, chunksize):
+        top.push(chunk.join(scores, on="Id", how="inner"))
+    return top.result()
+
+
+@profile_stage()
+def chunked_query_4(folder=DATA_FOLDER, chunksize=CHUNK_SIZE):
+    """Zapytanie 4 (zob. query_engine.query_4()) wykonywane na kawałkach tabel."""
+    counts = None
+    for chunk in read_chunks("Badges", ["Name"], {"Class": 1}, folder, chunksize):
+        counts = combine_partial(counts, chunk.groupby("Name").size())
+    names = counts[(counts >= 2) & (counts <= 10)].index
+
+    badges = collect_rows(read_chunks("Badges", ["Name", "UserId"], {"Class": 1}, folder, chunksize), "Name", names)
+    users = collect_rows(read_chunks("Users", ["Id", "DisplayName", "Reputation", "Age", "Location"], folder=folder,
+                                     chunksize=chunksize), "Id", badges["UserId"].unique())
+    return users.drop_duplicates().reset_index(drop=True)
+
+
+@profile_stage()
+def chunked_query_5(folder=DATA_FOLDER, chunksize=CHUNK_SIZE):
+    """Zapytanie 5 (zob. query_engine.query_5()) wykonywane na kawałkach tabel."""
+    # Przejście 1: maksymalny Score odpowiedzi każdego pytania i zaakceptowane odpowiedzi pytań
+    best = None
+    accepted = []
+    for chunk in read_chunks("Posts", ["Id", "PostTypeId", "ParentId", "Score", "AcceptedAnswerId"], folder=folder,
+                             chunksize=chunksize):
+        answers = chunk[chunk["PostTypeId"] == 2]
+        best = combine_partial(best, answers.groupby("ParentId")["Score"].max(), "max")
+        questions = chunk[chunk["PostTypeId"] == 1].dropna(subset=["AcceptedAnswerId"])
+        accepted.append(questions.set_index("Id")["AcceptedAnswerId"])
+    join1 = pd.concat(accepted).to_frame().join(best.rename("MaxScore"), how="inner")
+    join1.index.name = "Id"
+
+    # Przejście 2: Score zaakceptowanych odpowiedzi
+    scores = collect_rows(read_chunks("Posts", ["Id", "Score"], folder=folder, chunksize=chunksize),
+                          "Id", join1["AcceptedAnswerId"])
+    join2 = join1.reset_index().merge(scores.rename(columns={"Id": "AcceptedAnswerId", "Score": "AcceptedScore"}))
+    join2["Difference"] = join2["MaxScore"] - join2["AcceptedScore"]
+    join2 = join2[join2["Difference"] > 50]
+
+    # Przejście 3: tytuły pytań z wyniku
+    titles = collect_rows(read_chunks("Posts", ["Id", "Title"], folder=folder, chunksize=chunksize), "Id", join2["Id"])
+    pd_result = join2.merge(titles)[["Id", "Title", "MaxScore", "AcceptedScore", "Difference"]]
+    pd_result = pd_result.sort_values(by=["Difference"], ascending=False)
+    return pd_result.reset_index(drop=True)
+
+
+# Implementacje zapytań na kawałkach tabel, kluczami są numery zapytań z query_engine.SQL_QUERIES
+CHUNKED_QUERIES = {1: chunked_query_1, 2: chunked_query_2, 3: chunked_query_3, 4: chunked_query_4,
+                   5: chunked_query_5}
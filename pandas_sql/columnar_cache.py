@@ -0,0 +1,124 @@
+"""
+Modul columnar_cache.
+Pamięć podręczna tabel z plików CSV skompresowanych gzip w formacie kolumnowym (Feather lub Parquet).
+Przy pierwszym wczytaniu tabela jest konwertowana raz: kolumny całkowitoliczbowe są zapisywane
+w najmniejszym wystarczającym typie, a kolumny tekstowe o niewielkiej liczbie różnych wartości
+jako kategorie. Kolejne wczytania czytają plik kolumnowy przez mapowanie pamięci,
+tylko z potrzebnymi kolumnami. Poprawność pamięci podręcznej jest sprawdzana na podstawie
+rozmiaru i czasu modyfikacji pliku źródłowego, a po zmianie czasu modyfikacji także skrótu SHA-256.
+
+Przykład użycia:
+    Posts = read_cached_table("Posts", columns=["Id", "PostTypeId", "Score"])
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# Folder z danymi serwisu travel.stackexchange.com
+DATA_FOLDER = "travel_stackexchange_com"
+
+# Podfolder folderu z danymi, w którym zapisywana jest pamięć podręczna
+CACHE_FOLDER = ".cache"
+
+# Kolumny tekstowe, w których stosunek liczby różnych wartości do liczby niepustych wierszy
+# jest mniejszy niż CATEGORY_RATIO, są zapisywane jako kategorie
+CATEGORY_RATIO = 0.5
+
+# Dostępne formaty pamięci podręcznej. Feather bez kompresji pozwala na odczyt bez kopiowania
+# danych z mapowanego pliku, Parquet zajmuje mniej miejsca na dysku
+FORMATS = ("feather", "parquet")
+
+
+def file_hash(path, block_size=2 ** 20):
+    """Funkcja oblicza skrót SHA-256 pliku path, czytając go blokami."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def optimize_dtypes(df, category_ratio=CATEGORY_RATIO):
+    """
+    Funkcja zmniejsza typy kolumn ramki df: liczby całkowite są rzutowane na najmniejszy
+    wystarczający typ, a kolumny tekstowe o małej liczbie różnych wartości na kategorie.
+    Kolumny zmiennoprzecinkowe nie są zmieniane, aby nie tracić dokładności.
+    """
+    df = df.copy()
+    for column in df.columns:
+        col = df[column]
+        if pd.api.types.is_integer_dtype(col):
+            df[column] = pd.to_numeric(col, downcast="integer")
+        elif pd.api.types.is_object_dtype(col) and col.nunique() < category_ratio * col.count():
+            df[column] = col.astype("category")
+    return df
+
+
+def cache_paths(name, folder=DATA_FOLDER, fmt="feather", cache_folder=None):
+    """Funkcja zwraca ścieżki pliku źródłowego, pliku kolumnowego i pliku z metadanymi dla tabeli name."""
+    if cache_folder is None:
+        cache_folder = os.path.join(folder, CACHE_FOLDER)
+    source = os.path.join(folder, name + ".csv.gz")
+    cache = os.path.join(cache_folder, name + "." + fmt)
+    return source, cache, cache + ".json"
+
+
+def is_cache_valid(source, cache, meta_path):
+    """
+    Funkcja sprawdza, czy plik kolumnowy cache odpowiada plikowi źródłowemu source.
+    Jeśli zmienił się tylko czas modyfikacji, a skrót zawartości jest ten sam,
+    metadane są aktualizowane i pamięć podręczna pozostaje ważna.
+    """
+    if not (os.path.exists(cache) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    stat = os.stat(source)
+    if meta["size"] != stat.st_size:
+        return False
+    if meta["mtime"] == stat.st_mtime:
+        return True
+    if meta["sha256"] != file_hash(source):
+        return False
+    meta["mtime"] = stat.st_mtime
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return True
+
+
+def build_cache(source, cache, meta_path, fmt="feather"):
+    """Funkcja konwertuje plik source do pliku kolumnowego cache i zapisuje metadane pliku źródłowego."""
+    df = optimize_dtypes(pd.read_csv(source, compression="gzip"))
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    if fmt == "feather":
+        feather.write_feather(df, cache, compression="uncompressed")
+    else:
+        df.to_parquet(cache, index=False, compression="zstd")
+
+    stat = os.stat(source)
+    with open(meta_path, "w") as f:
+        json.dump({"size": stat.st_size, "mtime": stat.st_mtime, "sha256": file_hash(source)}, f)
+
+
+def read_cached_table(name, folder=DATA_FOLDER, columns=None, fmt="feather", cache_folder=None):
+    """
+    Funkcja wczytuje tabelę name (tylko kolumny columns, domyślnie wszystkie) z pamięci podręcznej,
+    tworząc ją najpierw, jeśli nie istnieje lub plik źródłowy się zmienił.
+    """
+    if fmt not in FORMATS:
+        raise ValueError("Nieznany format {0}, dostępne formaty to feather i parquet.".format(fmt))
+
+    source, cache, meta_path = cache_paths(name, folder, fmt, cache_folder)
+    if not is_cache_valid(source, cache, meta_path):
+        build_cache(source, cache, meta_path, fmt)
+
+    if fmt == "feather":
+        table = feather.read_table(cache, columns=columns, memory_map=True)
+    else:
+        table = pq.read_table(cache, columns=columns, memory_map=True)
+    return table.to_pandas()
@@ -0,0 +1,303 @@
+"""
+Modul query_engine.
+Realizacja zapytań SQL z notatnika sql_to_pandas.ipynb w pakiecie pandas ze wspólną pamięcią
+podręczną wyników pośrednich. Filtrowane widoki tabel (np. posty o PostTypeId == 1),
+tabele indeksowane kluczem (np. Posts.Id) oraz agregaty grup są obliczane raz i współdzielone
+przez wszystkie zapytania. Ponowne wczytanie tabeli unieważnia wyniki, które od niej zależą.
+
+Przykład użycia:
+    engine = QueryEngine().load("travel_stackexchange_com")
+    wynik = PANDAS_QUERIES[1](engine)
+"""
+
+import os
+
+import pandas as pd
+
+from _profiling_compat import profile_stage, stage
+from columnar_cache import read_cached_table
+
+# Folder z danymi serwisu travel.stackexchange.com
+DATA_FOLDER = "travel_stackexchange_com"
+
+# Tabele zrzutu Stack Exchange
+TABLES = ["Badges", "Comments", "PostLinks", "Posts", "Tags", "Users", "Votes"]
+
+QUERY_1 = """
+SELECT Posts.Title, RelatedTab.NumLinks
+FROM
+    (SELECT RelatedPostId AS PostId, COUNT(*) AS NumLinks
+    FROM PostLinks
+    GROUP BY RelatedPostId) AS RelatedTab
+JOIN Posts ON RelatedTab.PostId=Posts.Id
+WHERE Posts.PostTypeId=1
+ORDER BY NumLinks DESC
+"""
+
+QUERY_2 = """
+SELECT
+    Users.DisplayName,
+    Users.Age,
+    Users.Location,
+    SUM(Posts.FavoriteCount) AS FavoriteTotal,
+    Posts.Title AS MostFavoriteQuestion,
+    MAX(Posts.FavoriteCount) AS MostFavoriteQuestionLikes
+FROM Posts
+JOIN Users ON Users.Id=Posts.OwnerUserId
+WHERE Posts.PostTypeId=1
+GROUP BY OwnerUserId
+ORDER BY FavoriteTotal DESC
+LIMIT 10
+"""
+
+QUERY_3 = """
+SELECT
+    Posts.Title,
+    CmtTotScr.CommentsTotalScore
+FROM (
+    SELECT
+        PostID,
+        UserID,
+        SUM(Score) AS CommentsTotalScore
+    FROM Comments
+    GROUP BY PostID, UserID
+) AS CmtTotScr
+JOIN Posts ON Posts.ID=CmtTotScr.PostID AND Posts.OwnerUserId=CmtTotScr.UserID
+WHERE Posts.PostTypeId=1
+ORDER BY CmtTotScr.CommentsTotalScore DESC
+LIMIT 10
+"""
+
+QUERY_4 = """
+SELECT DISTINCT
+    Users.Id,
+    Users.DisplayName,
+    Users.Reputation,
+    Users.Age,
+    Users.Location
+FROM (
+    SELECT
+        Name, UserID
+    FROM Badges
+    WHERE Name IN (
+        SELECT
+        Name
+        FROM Badges
+        WHERE Class=1
+        GROUP BY Name
+        HAVING COUNT(*) BETWEEN 2 AND 10
+    )
+    AND Class=1
+    ) AS ValuableBadges
+JOIN Users ON ValuableBadges.UserId=Users.Id
+"""
+
+QUERY_5 = """
+SELECT
+    Questions.Id,
+    Questions.Title,
+    BestAnswers.MaxScore,
+    Posts.Score AS AcceptedScore,
+    BestAnswers.MaxScore-Posts.Score AS Difference
+FROM (
+        SELECT Id, ParentId, MAX(Score) AS MaxScore
+        FROM Posts
+        WHERE PostTypeId==2
+        GROUP BY ParentId
+    ) AS BestAnswers
+JOIN (
+        SELECT * FROM Posts
+        WHERE PostTypeId==1
+    ) AS Questions
+    ON Questions.Id=BestAnswers.ParentId
+JOIN Posts ON Questions.AcceptedAnswerId=Posts.Id
+WHERE Difference>50
+ORDER BY Difference DESC
+"""
+
+# Zapytania SQL z notatnika
+SQL_QUERIES = {1: QUERY_1, 2: QUERY_2, 3: QUERY_3, 4: QUERY_4, 5: QUERY_5}
+
+# Widoki tabel wykorzystywane przez zapytania: (tabela, kolumna, wartość)
+QUESTIONS = ("Posts", "PostTypeId", 1)
+ANSWERS = ("Posts", "PostTypeId", 2)
+GOLD_BADGES = ("Badges", "Class", 1)
+
+
+def _table(source):
+    """Zwraca nazwę tabeli, z której pochodzi tabela lub widok source."""
+    return source if isinstance(source, str) else source[0]
+
+
+def _key(value):
+    """Zamienia listę (np. kolumn) na krotkę, aby mogła być częścią klucza pamięci podręcznej."""
+    return value if isinstance(value, str) else tuple(value)
+
+
+def read_table(name, folder=DATA_FOLDER):
+    """Funkcja wczytuje tabelę name z pliku name.csv.gz w folderze folder."""
+    return pd.read_csv(os.path.join(folder, name + ".csv.gz"), compression="gzip")
+
+
+class QueryEngine:
+    """
+    Zbiór wczytanych tabel wraz z pamięcią podręczną wyników pośrednich zapytań.
+    Źródłem danych (source) dla metod jest nazwa tabeli albo widok (tabela, kolumna, wartość),
+    czyli wiersze tabeli, dla których kolumna ma podaną wartość.
+    Każdy wynik w pamięci podręcznej jest związany z tabelą, z której powstał,
+    i jest usuwany przy jej ponownym wczytaniu (zob. set_table()).
+    """
+
+    def __init__(self, tables=None):
+        self.tables = {}
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+        for name, df in (tables or {}).items():
+            self.set_table(name, df)
+
+    def load(self, folder=DATA_FOLDER, names=TABLES, cache=False):
+        """
+        Wczytanie tabel names z folderu folder. Dla cache=True tabele są wczytywane
+        z kolumnowej pamięci podręcznej (zob. columnar_cache.read_cached_table()).
+        Zwraca obiekt silnika.
+        """
+        for name in names:
+            with stage("read_table") as s:
+                df = read_cached_table(name, folder) if cache else read_table(name, folder)
+                s.rows = df.shape[0]
+            self.set_table(name, df)
+        return self
+
+    def set_table(self, name, df):
+        """Podmiana (wczytanie) tabeli name i unieważnienie zależnych od niej wyników."""
+        self.tables[name] = df
+        self.invalidate(name)
+
+    def invalidate(self, name=None):
+        """Usunięcie z pamięci podręcznej wyników zależnych od tabeli name (wszystkich dla None)."""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache = {key: value for key, value in self._cache.items() if key[0] != name}
+
+    def cached(self, table, key, func):
+        """
+        Zwraca wynik func() zapamiętany pod kluczem key. Wynik zależy od tabeli table,
+        więc jest unieważniany przy jej ponownym wczytaniu.
+        """
+        key = (table,) + key
+        if key in self._cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def frame(self, source):
+        """Zwraca tabelę lub widok source."""
+        if isinstance(source, str):
+            return self.tables[source]
+        table, column, value = source
+
+        def view():
+            df = self.tables[table]
+            return df.loc[df[column] == value]
+        return self.cached(table, ("view", column, value), view)
+
+    def index(self, source, keys):
+        """Zwraca tabelę lub widok source z indeksem utworzonym z kolumn keys."""
+        return self.cached(_table(source), ("index", source, _key(keys)),
+                           lambda: self.frame(source).set_index(keys))
+
+    def group_agg(self, source, by, column=None, func="size"):
+        """
+        Zwraca agregat func kolumny column w grupach według kolumn by dla tabeli lub widoku source
+        (dla func="size" liczności grup). Wynik jest serią (lub ramką dla listy funkcji)
+        indeksowaną kluczami grup.
+        """
+        def aggregate():
+            groups = self.frame(source).groupby(by, observed=True)
+            if func == "size":
+                return groups.size()
+            return groups[column].agg(func)
+        return self.cached(_table(source), ("group", source, _key(by), column, _key(func)), aggregate)
+
+
+@profile_stage()
+def query_1(engine):
+    """Zapytanie 1: tytuły pytań wraz z liczbą powiązanych z nimi postów."""
+    RelatedTab = engine.group_agg("PostLinks", "RelatedPostId").to_frame("NumLinks")
+    questions = engine.index(QUESTIONS, "Id")
+    join = RelatedTab.join(questions["Title"], how="inner")
+    pd_result = join[["Title", "NumLinks"]].sort_values(by=["NumLinks"], ascending=False)
+    return pd_result.reset_index(drop=True)
+
+
+@profile_stage()
+def query_2(engine):
+    """Zapytanie 2: 10 użytkowników z największą sumą FavoriteCount ich pytań."""
+    aggr = engine.group_agg(QUESTIONS, "OwnerUserId", "FavoriteCount", ["sum", "max"])
+    aggr = aggr.rename(columns={"sum": "FavoriteTotal", "max": "MostFavoriteQuestionLikes"})
+    users = engine.index("Users", "Id")[["DisplayName", "Age", "Location"]]
+    aggr = aggr[aggr.index.isin(users.index)]
+    # Jak w SQL suma samych wartości NULL to NULL (pandas zwraca 0)
+    totals = aggr["FavoriteTotal"].where(aggr["MostFavoriteQuestionLikes"].notna())
+    aggr = aggr.assign(FavoriteTotal=totals)
+    # Tytuły dopasowujemy tylko dla kandydatów do pierwszej dziesiątki (z remisami),
+    # a gdy jest ich mniej niż 10, także dla użytkowników z sumą NULL
+    largest = totals.nlargest(10)
+    top = aggr[(totals >= largest.min()) | (totals.isna() & (largest.shape[0] < 10))]
+    questions = engine.index(QUESTIONS, "OwnerUserId")
+    post_titles = questions.loc[questions.index.isin(top.index), ["Title", "FavoriteCount"]]
+    join1 = post_titles.join(top, how="inner")
+    # Dla użytkowników bez FavoriteCount wybieramy dowolne pytanie
+    no_likes = join1["MostFavoriteQuestionLikes"].isna() & ~join1.index.duplicated()
+    join1 = join1[(join1["FavoriteCount"] == join1["MostFavoriteQuestionLikes"]) | no_likes]
+    join2 = join1.join(users, how="inner")
+    pd_result = join2.rename(columns={"Title": "MostFavoriteQuestion"})[
+        ["DisplayName", "Age", "Location", "FavoriteTotal", "MostFavoriteQuestion", "MostFavoriteQuestionLikes"]]
+    pd_result = pd_result.sort_values(by=["FavoriteTotal"], ascending=False).head(10)
+    return pd_result.reset_index(drop=True)
+
+
+@profile_stage()
+def query_3(engine):
+    """Zapytanie 3: 10 pytań z największą sumą Score komentarzy ich autorów."""
+    CmtTotScr = engine.group_agg("Comments", ["PostId", "UserId"], "Score", "sum").to_frame("CommentsTotalScore")
+    questions = engine.index(QUESTIONS, ["Id", "OwnerUserId"])
+    join = CmtTotScr.rename_axis(["Id", "OwnerUserId"]).join(questions["Title"], how="inner")
+    pd_result = join[["Title", "CommentsTotalScore"]].nlargest(10, "CommentsTotalScore")
+    return pd_result.reset_index(drop=True)
+
+
+@profile_stage()
+def query_4(engine):
+    """Zapytanie 4: użytkownicy posiadający odznaki klasy 1 przyznane od 2 do 10 razy."""
+    counts = engine.group_agg(GOLD_BADGES, "Name")
+    names = counts[(counts >= 2) & (counts <= 10)].index
+    badges_class1 = engine.frame(GOLD_BADGES)
+    ValuableBadges = badges_class1.loc[badges_class1["Name"].isin(names), ["UserId"]]
+    users = engine.index("Users", "Id")[["DisplayName", "Reputation", "Age", "Location"]]
+    join = ValuableBadges.join(users, on="UserId", how="inner").rename(columns={"UserId": "Id"})
+    pd_result = join[["Id", "DisplayName", "Reputation", "Age", "Location"]].drop_duplicates()
+    return pd_result.reset_index(drop=True)
+
+
+@profile_stage()
+def query_5(engine):
+    """Zapytanie 5: pytania, dla których najlepsza odpowiedź ma o ponad 50 większy Score niż zaakceptowana."""
+    BestAnswers = engine.group_agg(ANSWERS, "ParentId", "Score", "max").to_frame("MaxScore")
+    questions = engine.index(QUESTIONS, "Id")[["Title", "AcceptedAnswerId"]]
+    join1 = BestAnswers.rename_axis("Id").join(questions, how="inner")
+    scores = engine.index("Posts", "Id")["Score"].rename("AcceptedScore")
+    join2 = join1.reset_index().merge(scores, left_on="AcceptedAnswerId", right_index=True)
+    # Rzutowanie na int64, aby różnica nie przekroczyła zakresu zmniejszonych typów kolumn
+    join2["Difference"] = join2["MaxScore"].astype("int64") - join2["AcceptedScore"].astype("int64")
+    pd_result = join2.loc[join2["Difference"] > 50, ["Id", "Title", "MaxScore", "AcceptedScore", "Difference"]]
+    pd_result = pd_result.sort_values(by=["Difference"], ascending=False)
+    return pd_result.reset_index(drop=True)
+
+
+# Implementacje zapytań w pandas, kluczami są numery zapytań z SQL_QUERIES
+PANDAS_QUERIES = {1: query_1, 2: query_2, 3: query_3, 4: query_4, 5: query_5}
@@ -0,0 +1,123 @@
+"""
+Modul sqlite_loader.
+Wczytanie tabel do bazy SQLite na potrzeby porównań z zapytaniami w pandas.
+W przeciwieństwie do DataFrame.to_sql tabele mają typy kolumn wyznaczone z danych,
+wiersze są wstawiane partiami w osobnych transakcjach przy ustawieniach PRAGMA przyspieszających
+zapis, a po wczytaniu tworzone są indeksy na kluczach złączeń i grupowań używanych w zapytaniach.
+Połączenia są przechowywane w puli i ponownie używane dla tej samej ścieżki bazy.
+
+Przykład użycia:
+    conn = load_database(QueryEngine().load().tables)
+    wynik = get_sql_dataframe(SQL_QUERIES[1], conn)
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from _profiling_compat import profile_stage
+
+# Domyślna liczba wierszy wstawianych w jednej transakcji
+CHUNK_SIZE = 50000
+
+# Ustawienia bazy na czas wczytywania danych (baza jest tylko kopią danych z plików CSV)
+PRAGMAS = [
+    "journal_mode = OFF",
+    "synchronous = OFF",
+    "temp_store = MEMORY",
+    "cache_size = -262144",
+]
+
+# Indeksy na kolumnach złączeń i grupowań z zapytań: tabela -> listy kolumn indeksów
+INDEXES = {
+    "Posts": [["Id"], ["OwnerUserId"], ["PostTypeId"], ["ParentId"]],
+    "PostLinks": [["RelatedPostId"]],
+    "Comments": [["PostId", "UserId"], ["UserId"]],
+    "Users": [["Id"]],
+    "Badges": [["Class", "Name"], ["UserId"]],
+}
+
+# Otwarte połączenia, kluczami są ścieżki baz danych
+_connections = {}
+
+
+def get_connection(path=":memory:"):
+    """
+    Funkcja zwraca połączenie do bazy path z puli (tworząc je przy pierwszym wywołaniu).
+    Dla path=":memory:" baza jest przechowywana w pamięci.
+    """
+    if path not in _connections:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute("PRAGMA " + pragma)
+        _connections[path] = conn
+    return _connections[path]
+
+
+def close_connections():
+    """Funkcja zamyka wszystkie połączenia z puli."""
+    for conn in _connections.values():
+        conn.close()
+    _connections.clear()
+
+
+def sqlite_type(col):
+    """
+    Funkcja zwraca typ SQLite dla kolumny col. Kolumny zmiennoprzecinkowe zawierające
+    same liczby całkowite (i wartości brakujące, np. OwnerUserId) mają typ INTEGER.
+    """
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        col = pd.Series(col.cat.categories)
+    if pd.api.types.is_bool_dtype(col) or pd.api.types.is_integer_dtype(col):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(col):
+        values = col.dropna().to_numpy()
+        return "INTEGER" if np.array_equal(values, np.floor(values)) else "REAL"
+    return "TEXT"
+
+
+def create_table(conn, name, df):
+    """Funkcja tworzy (od nowa) tabelę name z kolumnami i typami ramki df."""
+    columns = ", ".join('"{0}" {1}'.format(column, sqlite_type(df[column])) for column in df.columns)
+    conn.execute('DROP TABLE IF EXISTS "{0}"'.format(name))
+    conn.execute('CREATE TABLE "{0}" ({1})'.format(name, columns))
+
+
+def insert_rows(conn, name, df, chunksize=CHUNK_SIZE):
+    """Funkcja wstawia wiersze ramki df do tabeli name partiami po chunksize wierszy w transakcjach."""
+    query = 'INSERT INTO "{0}" VALUES ({1})'.format(name, ", ".join("?" * df.shape[1]))
+    for start in range(0, df.shape[0], chunksize):
+        chunk = df.iloc[start:start + chunksize].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        with conn:
+            conn.executemany(query, chunk.itertuples(index=False, name=None))
+
+
+def create_indexes(conn, name, indexes):
+    """Funkcja tworzy indeksy na podanych listach kolumn tabeli name."""
+    for columns in indexes:
+        conn.execute('CREATE INDEX "idx_{0}_{1}" ON "{0}" ({2})'.format(
+            name, "_".join(columns), ", ".join('"{0}"'.format(column) for column in columns)))
+
+
+@profile_stage()
+def load_database(tables, path=":memory:", chunksize=CHUNK_SIZE, indexes=INDEXES):
+    """
+    Funkcja wczytuje tabele (słownik: nazwa -> ramka danych) do bazy path
+    (domyślnie w pamięci), tworzy indeksy indexes i zbiera statystyki dla optymalizatora zapytań.
+    Zwraca połączenie do bazy z puli (zob. get_connection()).
+    """
+    conn = get_connection(path)
+    for name, df in tables.items():
+        create_table(conn, name, df)
+        insert_rows(conn, name, df, chunksize)
+        create_indexes(conn, name, indexes.get(name, []))
+    conn.execute("ANALYZE")
+    return conn
+
+
+@profile_stage("sql_query")
+def get_sql_dataframe(query, conn=None):
+    """Funkcja wykonuje zapytanie query i zwraca wynikową ramkę danych (domyślnie w bazie w pamięci)."""
+    return pd.read_sql_query(query, conn if conn is not None else get_connection())
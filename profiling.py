@@ -0,0 +1,201 @@
+"""
+Modul profiling.
+Opcjonalna instrumentacja etapów obliczeń we wszystkich trzech projektach.
+Dla każdego etapu (funkcji oznaczonej dekoratorem profile_stage() albo bloku with stage())
+zapisywany jest rekord z czasem rzeczywistym, czasem procesora, maksymalnym przyrostem pamięci
+(tracemalloc) i liczbą wierszy wyniku. Rekordy są przekazywane do odbiorników (sinks):
+MemorySink, JsonLinesSink lub LogSink (albo dowolnej funkcji przyjmującej rekord).
+Instrumentacja jest domyślnie wyłączona i wtedy dekorator jedynie wywołuje funkcję.
+
+Przykład użycia:
+    sink = MemorySink()
+    with profiling(sink):
+        spectral_clustering(X, 3, 5)
+    print(sink.to_frame())
+"""
+
+import functools
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Aktywne odbiorniki rekordów, pusta lista oznacza wyłączoną instrumentację
+_sinks = []
+
+# Stos aktywnych etapów (etapy mogą być zagnieżdżone)
+_stack = []
+
+# Czy śledzenie pamięci zostało włączone przez enable()
+_started_tracemalloc = False
+
+
+class MemorySink:
+    """Odbiornik przechowujący rekordy w liście records."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def to_frame(self):
+        """Zwraca rekordy jako ramkę danych."""
+        import pandas as pd
+        return pd.DataFrame(self.records)
+
+
+class JsonLinesSink:
+    """Odbiornik dopisujący rekordy do pliku path w formacie JSON Lines (jeden rekord w wierszu)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a")
+
+    def __call__(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class LogSink:
+    """Odbiornik zapisujący rekordy do loggera logger (domyślnie "profiling") na poziomie level."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger if logger is not None else logging.getLogger("profiling")
+        self.level = level
+
+    def __call__(self, record):
+        self.logger.log(self.level, "%s", json.dumps(record))
+
+
+def enable(*sinks, memory=True):
+    """
+    Włączenie instrumentacji z odbiornikami sinks. Dla memory=True mierzone jest również
+    zużycie pamięci przez tracemalloc, co spowalnia obliczenia.
+    """
+    global _started_tracemalloc
+    _sinks[:] = sinks
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable():
+    """Wyłączenie instrumentacji."""
+    global _started_tracemalloc
+    _sinks.clear()
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def is_enabled():
+    """Zwraca True, jeśli instrumentacja jest włączona."""
+    return bool(_sinks)
+
+
+@contextmanager
+def profiling(*sinks, memory=True):
+    """Instrumentacja włączona na czas bloku with (zob. enable())."""
+    enable(*sinks, memory=memory)
+    try:
+        yield
+    finally:
+        disable()
+
+
+def count_rows(result):
+    """
+    Funkcja zwraca liczbę wierszy wyniku etapu: pierwszy wymiar dla tablic i ramek danych,
+    liczbę wierszy pierwszego elementu dla krotek oraz None dla innych wyników.
+    """
+    if hasattr(result, "shape") and len(result.shape) > 0:
+        return int(result.shape[0])
+    if isinstance(result, tuple) and result:
+        return count_rows(result[0])
+    return None
+
+
+class _Stage:
+    """Pomiar pojedynczego etapu. Liczbę wierszy można ustawić w bloku with przez atrybut rows."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # Maksimum dotychczasowej pamięci przekazujemy etapowi nadrzędnemu przed wyzerowaniem
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory, self.peak = current, current
+        _stack.append(self)
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_time = time.perf_counter() - self.start_wall
+        cpu_time = time.process_time() - self.start_cpu
+        _stack.pop()
+        record = {"stage": self.name, "wall_time": wall_time, "cpu_time": cpu_time, "peak_memory_mb": None,
+                  "rows": self.rows, "error": exc_type.__name__ if exc_type is not None else None}
+        if tracemalloc.is_tracing() and hasattr(self, "peak"):
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            record["peak_memory_mb"] = (self.peak - self.start_memory) / 2 ** 20
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, self.peak)
+        for sink in _sinks:
+            sink(record)
+        return False
+
+
+class _NullStage:
+    """Etap zwracany przy wyłączonej instrumentacji, niczego nie mierzy."""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, rows=None):
+    """
+    Zwraca menedżer kontekstu mierzący blok with jako etap name. Liczbę wierszy można
+    podać w rows albo ustawić w bloku: with stage("etap") as s: ...; s.rows = n.
+    """
+    return _Stage(name, rows) if _sinks else _NULL_STAGE
+
+
+def profile_stage(name=None, rows=count_rows):
+    """
+    Dekorator mierzący każde wywołanie funkcji jako etap name (domyślnie nazwa funkcji).
+    Liczba wierszy jest wyznaczana z wyniku funkcją rows.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return func(*args, **kwargs)
+            with _Stage(stage_name) as s:
+                result = func(*args, **kwargs)
+                s.rows = rows(result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,20 @@
+"""
+Modul _profiling_compat.
+Opcjonalny import instrumentacji z modułu profiling (profiling.py w katalogu głównym repozytorium).
+Jeśli moduł profiling nie jest dostępny (np. katalog główny nie jest w PYTHONPATH),
+profile_stage() i stage() niczego nie mierzą, a moduły projektu działają bez zmian.
+"""
+
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+try:
+    from profiling import profile_stage, stage
+except ImportError:
+    def profile_stage(name=None, rows=None):
+        """Dekorator zwracający funkcję bez zmian."""
+        return lambda func: func
+
+    def stage(name, rows=None):
+        """Zwraca blok with bez pomiaru, w którym można ustawić atrybut rows."""
+        return nullcontext(SimpleNamespace(rows=rows))
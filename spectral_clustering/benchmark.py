@@ -0,0 +1,97 @@
+"""
+Modul benchmark.
+Modul mierzy czas wykonania, maksymalne zużycie pamięci oraz jakość podziału
+funkcji Mnn(), Mnn_graph(), Laplacian_eigen() i spectral_clustering() z modułu spectral
+dla siatek parametrów n, d, k, M na danych syntetycznych z make_blobs.
+Wyniki zapisywane są do pliku CSV, który można porównać z wynikami poprzedniego uruchomienia.
+
+Wspólne funkcje benchmarków pochodzą z modułu benchmarking w katalogu głównym repozytorium,
+który musi być w PYTHONPATH.
+
+Przykłady użycia:
+    PYTHONPATH=.. python benchmark.py --n 500 1000 --d 2 3 --k 3 5 --M 5 10 --method kd_tree --sparse --solver eigsh -o wyniki.csv
+    PYTHONPATH=.. python benchmark.py --compare stare.csv nowe.csv
+"""
+
+import argparse
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_blobs
+from sklearn.metrics.cluster import adjusted_rand_score
+
+from benchmarking import measure, add_common_arguments, print_comparison, save_results
+from spectral import Mnn, Mnn_graph, Laplacian_eigen, spectral_clustering
+
+# Kolumny identyfikujące pojedynczy pomiar przy porównywaniu wyników
+KEY_COLUMNS = ["stage", "n", "d", "k", "M", "method", "sparse", "solver", "laplacian", "n_jobs"]
+
+
+def make_data(n, d, k, random_state=0):
+    """Funkcja generuje n punktów z R^d tworzących k skupisk oraz referencyjne etykiety."""
+    return make_blobs(n_samples=n, n_features=d, centers=k, cluster_std=1.0, random_state=random_state)
+
+
+def run_benchmark(ns, ds, ks, Ms, method="dense", sparse=False, solver="eig", laplacian="unnormalized",
+                  n_jobs=None, repeat=3, random_state=0):
+    """
+    Funkcja wykonuje pomiary dla wszystkich kombinacji parametrów n, d, k, M.
+    Każdy etap algorytmu jest mierzony osobno na wyniku poprzedniego etapu,
+    a czas to minimum z repeat uruchomień (zob. benchmarking.measure()).
+    ------------------
+    return value:
+    results - ramka danych z kolumnami KEY_COLUMNS oraz time (s), peak_memory_mb i ari
+    (skorygowany indeks Randa, tylko dla etapu spectral_clustering)
+    """
+    config = {"method": method, "sparse": sparse, "solver": solver, "laplacian": laplacian, "n_jobs": n_jobs}
+    rows = []
+
+    for n, d, k, M in product(ns, ds, ks, Ms):
+        X, labels_true = make_data(n, d, k, random_state)
+        params = dict(n=n, d=d, k=k, M=M, **config)
+
+        S, t, mem = measure(Mnn, X, M, method, n_jobs=n_jobs, repeat=repeat)
+        rows.append(dict(stage="Mnn", time=t.min(), peak_memory_mb=mem, ari=np.nan, **params))
+
+        G, t, mem = measure(Mnn_graph, S, sparse, n_jobs, repeat=repeat)
+        rows.append(dict(stage="Mnn_graph", time=t.min(), peak_memory_mb=mem, ari=np.nan, **params))
+
+        _, t, mem = measure(Laplacian_eigen, G, k, solver, laplacian, repeat=repeat)
+        rows.append(dict(stage="Laplacian_eigen", time=t.min(), peak_memory_mb=mem, ari=np.nan, **params))
+
+        labels, t, mem = measure(spectral_clustering, X, k, M, method, sparse, solver, laplacian, n_jobs,
+                                 repeat=repeat)
+        # spectral_clustering zwraca pustą tablicę, jeśli wystąpił wyjątek
+        ari = adjusted_rand_score(labels_true, labels) if len(labels) == n else np.nan
+        rows.append(dict(stage="spectral_clustering", time=t.min(), peak_memory_mb=mem, ari=ari, **params))
+
+    return pd.DataFrame(rows, columns=KEY_COLUMNS + ["time", "peak_memory_mb", "ari"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark modułu spectral.")
+    parser.add_argument("--n", type=int, nargs="+", default=[250, 500, 1000], help="liczby punktów")
+    parser.add_argument("--d", type=int, nargs="+", default=[2, 3], help="wymiary danych")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 5], help="liczby skupień")
+    parser.add_argument("--M", type=int, nargs="+", default=[5, 10], help="liczby najbliższych sąsiadów")
+    parser.add_argument("--method", default="dense", help="metoda wyznaczania sąsiadów (zob. Mnn())")
+    parser.add_argument("--sparse", action="store_true", help="rzadka macierz sąsiedztwa")
+    parser.add_argument("--solver", default="eig", help="metoda wyznaczania wektorów własnych")
+    parser.add_argument("--laplacian", default="unnormalized", help="wariant laplasjanu")
+    parser.add_argument("--n-jobs", type=int, default=None, help="liczba wątków")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno generatora danych")
+    add_common_arguments(parser, repeat=3)
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(args, KEY_COLUMNS, "time", KEY_COLUMNS[:5])
+        return
+
+    df = run_benchmark(args.n, args.d, args.k, args.M, args.method, args.sparse, args.solver, args.laplacian,
+                       args.n_jobs, args.repeat, args.seed)
+    save_results(df, args.output)
+
+
+if __name__ == "__main__":
+    main()
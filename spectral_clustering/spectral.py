@@ -1,15 +1,198 @@
 """
 Modul spectral.
-Modul zawiera implementacje funkcji Mnn(), Mnn_graph(), Laplacian_eigen(), spectral_clustering() 
+Modul zawiera implementacje funkcji Mnn(), Mnn_graph(), Laplacian_eigen(), spectral_clustering(), 
+spectral_clustering_sweep() oraz klasy SpectralClustering z metodami fit(), predict(), transform()
 """
 
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from scipy.sparse import csr_matrix
+import pandas as pd
+from scipy.linalg import eigh
+from scipy.sparse import coo_matrix, csr_matrix, diags, issparse
 from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import eigsh, lobpcg
+from scipy.spatial import cKDTree
 from sklearn.cluster import KMeans
+from sklearn.neighbors import BallTree
+
+from _profiling_compat import profile_stage, stage
+
+
+# Dostępne metody wyznaczania najbliższych sąsiadów w funkcji Mnn()
+MNN_METHODS = ("dense", "brute", "kd_tree", "ball_tree", "approx", "auto")
+
+# Maksymalna liczba elementów bloku macierzy odległości w metodzie "brute" (ok. 64 MB dla float64)
+MNN_BLOCK_ELEMENTS = 2 ** 23
+
+# Maksymalny wymiar danych, dla którego metoda "auto" wybiera drzewo k-wymiarowe
+MNN_AUTO_TREE_MAX_DIM = 15
+
+# Dostępne metody wyznaczania wektorów własnych w funkcji Laplacian_eigen()
+EIGEN_SOLVERS = ("eig", "eigh", "eigsh", "lobpcg")
+
+# Dostępne warianty laplasjanu: L = D - G, L_sym = D^(-1/2) L D^(-1/2), L_rw = D^(-1) L
+LAPLACIAN_TYPES = ("unnormalized", "sym", "rw")
+
+# Przesunięcie sigma w metodzie shift-invert, ujemne, bo laplasjan jest osobliwy (wartość własna 0)
+EIGSH_SIGMA = -1e-5
+
+
+def _n_workers(n_jobs):
+    """
+    Funkcja wyznacza liczbę wątków dla parametru n_jobs: 
+    None oznacza 1 wątek, wartości ujemne liczone są od liczby procesorów (-1 = wszystkie).
+    """
+    if n_jobs is None:
+        return 1
+    if type(n_jobs) != int or n_jobs == 0:
+        raise ValueError("Parametr n_jobs powinien być niezerową liczbą całkowitą lub None.")
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def _run_blocks(func, n, block_size, n_jobs=None):
+    """
+    Funkcja wywołuje func(start, stop) dla kolejnych bloków wierszy z zakresu [0,n).
+    Dla n_jobs > 1 bloki są przetwarzane w puli wątków - wątki współdzielą macierze wejściowe
+    bez kopiowania, a numpy i scipy zwalniają GIL w obliczeniach na blokach. 
+    Każdy blok zapisuje wynik do własnego zakresu wierszy, więc wynik nie zależy od n_jobs.
+    """
+    bounds = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+    workers = _n_workers(n_jobs)
+    if workers == 1 or len(bounds) == 1:
+        for start, stop in bounds:
+            func(start, stop)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda b: func(*b), bounds))
+
+
+def _drop_self(I, M):
+    """
+    Funkcja usuwa z macierzy indeksów I o wymiarach (n,M+1) indeks samego punktu.
+    Jeśli w wierszu nie ma indeksu punktu (np. gdy w zbiorze są duplikaty), 
+    usuwany jest ostatni, najdalszy sąsiad.
+    """
+    n = I.shape[0]
+    mask = I == np.arange(n)[:, np.newaxis]
+    no_self = ~mask.any(axis=1)
+    # Indeksy w wierszu są różne, więc w każdym wierszu zaznaczony jest dokładnie jeden element
+    mask[no_self, -1] = True
+    return I[~mask].reshape(n, M)
+
+
+def _mnn_dense(X, M, n_jobs=None):
+    """
+    Funkcja wyznacza macierz sąsiadów na podstawie pełnej macierzy odległości (n,n).
+    Odległości i sortowanie wierszy są obliczane blokami wierszy, więc dla n_jobs > 1 
+    obie części są wykonywane równolegle.
+    """
+    n, d = X.shape
+    S = np.zeros((n, M), dtype=np.int)
+    # Stworzenie macierzy pomocniczej gdzie P[i,j] = ||x[i] - x[j]||
+    P = np.zeros((n, n))
+    
+    # Uzupełnienie bloku wierszy macierzy P (różnice mają wymiary (b,n,d)), a następnie 
+    # uzupełnienie macierzy S poprzez posortowanie wierszy bloku i wybranie pierwszych M elementów
+    def fill_rows(start, stop):
+        diff = X[start:stop, np.newaxis, :] - X[np.newaxis, :, :]
+        P[start:stop] = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+        rows = np.arange(start, stop)
+        P[rows, rows] = np.inf
+        S[start:stop] = np.argsort(P[start:stop], axis=1)[:, 0:M]
+    
+    _run_blocks(fill_rows, n, max(1, MNN_BLOCK_ELEMENTS // (n * d)), n_jobs)
+    
+    return S
+
+
+def _knn_brute_block(B, X, b_sq_norms, x_sq_norms, M, start=None):
+    """
+    Funkcja wyznacza M najbliższych sąsiadów w X dla wierszy macierzy B
+    na podstawie bloku macierzy kwadratów odległości o wymiarach (b,n).
+    Jeśli B = X[start:start+b], to każdy punkt jest pomijany jako swój własny sąsiad.
+    """
+    # ||a - b||^2 = ||a||^2 - 2<a,b> + ||b||^2
+    D = b_sq_norms[:, np.newaxis] - 2 * (B @ X.T) + x_sq_norms[np.newaxis, :]
+    rows = np.arange(B.shape[0])
+    if start is not None:
+        D[rows, rows + start] = np.inf
+    
+    # Częściowe sortowanie - wybranie M najmniejszych odległości w każdym wierszu,
+    # a następnie posortowanie tylko tych M elementów
+    I = np.argpartition(D, M - 1, axis=1)[:, :M]
+    order = np.argsort(D[rows[:, np.newaxis], I], axis=1, kind="stable")
+    return np.take_along_axis(I, order, axis=1)
 
 
-def Mnn(X, M):
+def _knn_brute(X, Y, M, block_size=None, exclude_self=False, n_jobs=None):
+    """
+    Funkcja wyznacza M najbliższych sąsiadów w X dla wierszy Y blokami wierszy, 
+    tak aby pamięć była ograniczona do (block_size,n) zamiast (m,n).
+    Dla exclude_self=True zakładamy, że Y = X i pomijamy sam punkt.
+    """
+    n = X.shape[0]
+    if block_size is None:
+        block_size = max(1, MNN_BLOCK_ELEMENTS // n)
+    
+    x_sq_norms = np.einsum("ij,ij->i", X, X)
+    y_sq_norms = x_sq_norms if exclude_self else np.einsum("ij,ij->i", Y, Y)
+    S = np.empty((Y.shape[0], M), dtype=np.int)
+    
+    def fill_block(start, stop):
+        S[start:stop] = _knn_brute_block(Y[start:stop], X, y_sq_norms[start:stop], x_sq_norms, M,
+                                         start if exclude_self else None)
+    
+    _run_blocks(fill_block, Y.shape[0], block_size, n_jobs)
+    return S
+
+
+def _build_tree(X, method):
+    """Funkcja buduje drzewo kul (ball_tree) lub drzewo k-wymiarowe (pozostałe metody) dla punktów X."""
+    if method == "ball_tree":
+        return BallTree(X)
+    return cKDTree(X)
+
+
+def _query_tree(tree, Y, k, eps=0.0, n_jobs=None):
+    """
+    Funkcja zwraca macierz (m,k) indeksów k najbliższych punktów drzewa dla wierszy Y.
+    Dla n_jobs > 1 wiersze Y są dzielone na równe bloki odpytywane w osobnych wątkach.
+    """
+    m = Y.shape[0]
+    I = np.empty((m, k), dtype=np.intp)
+    
+    def query_block(start, stop):
+        if isinstance(tree, BallTree):
+            _, idx = tree.query(Y[start:stop], k=k)
+        else:
+            _, idx = tree.query(Y[start:stop], k=k, eps=eps)
+        I[start:stop] = idx.reshape(stop - start, k)
+    
+    workers = _n_workers(n_jobs)
+    _run_blocks(query_block, m, max(1, -(-m // workers)), n_jobs)
+    return I
+
+
+def _mnn_tree(X, M, method, eps=0.0, tree=None, n_jobs=None):
+    """
+    Funkcja wyznacza macierz sąsiadów z użyciem drzewa k-wymiarowego (kd_tree, approx)
+    lub drzewa kul (ball_tree). Dla eps > 0 zwracani sąsiedzi są przybliżeni, tzn. 
+    odległość do j-tego sąsiada jest co najwyżej (1+eps) razy większa od dokładnej.
+    Można przekazać zbudowane wcześniej drzewo tree dla punktów X.
+    """
+    if tree is None:
+        tree = _build_tree(X, method)
+    I = _query_tree(tree, X, M+1, eps, n_jobs)
+    return _drop_self(I, M).astype(np.int)
+
+
+@profile_stage("Mnn")
+def Mnn(X, M, method="dense", block_size=None, eps=1.0, n_jobs=None):
     """
     Funkcja wyznacza macierz najbliższych sąsiadów 
     dla zadanej macierzy X oraz liczby naturalnej M. 
@@ -17,6 +200,17 @@ def Mnn(X, M):
     param:
     X - dwuwymiarowa macierz o wymiarach (n,d) i elementach rzeczywistych
     N - liczba naturalna oznaczająca drugi wymiar macierzy wyjściowej
+    method - metoda wyznaczania sąsiadów:
+        "dense" - pełna macierz odległości (n,n), pamięć O(n^2)
+        "brute" - blokowe, zwektoryzowane obliczanie odległości z użyciem argpartition
+        "kd_tree" - drzewo k-wymiarowe, zalecane dla małych wymiarów d
+        "ball_tree" - drzewo kul
+        "approx" - przybliżeni sąsiedzi wyznaczeni drzewem k-wymiarowym z tolerancją eps
+        "auto" - "kd_tree" dla d <= MNN_AUTO_TREE_MAX_DIM, w przeciwnym razie "brute"
+    block_size - liczba wierszy bloku w metodzie "brute" (domyślnie dobierana do MNN_BLOCK_ELEMENTS)
+    eps - tolerancja przybliżenia dla metody "approx"
+    n_jobs - liczba wątków przetwarzających bloki wierszy (None - obliczenia sekwencyjne, -1 - wszystkie procesory);
+    wynik jest identyczny jak przy obliczeniach sekwencyjnych
     ------------------
     return value:
     S - dwuwymiarow macierz o wymiarach (n,M) i elementach rzeczywistych, 
@@ -36,31 +230,59 @@ def Mnn(X, M):
     if M > X.shape[0] - 1:
         raise ValueError("Ilość sąsiadów M = {0} jest większa niż ilość możliwych sąsiadów n = {1}.".format(M, X.shape[0]-1))
     
+    if method not in MNN_METHODS:
+        raise ValueError("Nieznana metoda {0}, dostępne metody to {1}.".format(method, MNN_METHODS))
+    
     # Sprawdzenie typu wartości macierzy X i ewentualna konwersja na float    
     if X.dtype != np.float:
         X = X.astype(np.float)
     
-    n, d = X.shape
-    S = np.zeros((n, M), dtype=np.int)
-    # Stworzenie macierzy pomocniczej gdzie P[i,j] = ||x[i] - x[j]||
-    P = np.zeros((n, n))
-    for i in range(n):
-        P[i, i] = np.inf
-        for j in range(i+1, n):
-            dist = np.linalg.norm(X[i] - X[j])
-            P[i, j] = dist
-            P[j, i] = dist
-    
-    # Uzupełnienie macierzy S poprzez posortowanie kolejnych wierszy macierzy P
-    # i wybranie pierwszych M elementów każdego wiersza
-    for i in range(n):
-        S[i] = np.argsort(P[i])[0:M]
-     
-    # Zwrócenie wynikowej macierzy z konwersją wartośći indeksów na int
-    return S
+    if method == "auto":
+        method = "kd_tree" if X.shape[1] <= MNN_AUTO_TREE_MAX_DIM else "brute"
+    
+    # Zwrócenie wynikowej macierzy z wartościami indeksów typu int
+    if method == "dense":
+        return _mnn_dense(X, M, n_jobs)
+    elif method == "brute":
+        return _knn_brute(X, X, M, block_size, exclude_self=True, n_jobs=n_jobs)
+    elif method == "approx":
+        return _mnn_tree(X, M, method, eps, n_jobs=n_jobs)
+    else:
+        return _mnn_tree(X, M, method, n_jobs=n_jobs)
 
 
-def Mnn_graph(S):
+def _mnn_graph_sparse(S):
+    """
+    Funkcja wyznacza macierz sąsiedztwa jako rzadką macierz csr_matrix,
+    budując ją bezpośrednio z par (i, S[i,u]) bez pętli po wszystkich parach wierzchołków.
+    Krawędzie uspójniające są wybierane tak samo jak w wersji gęstej.
+    """
+    n, m = S.shape
+    rows = np.repeat(np.arange(n), m)
+    cols = S.ravel()
+    keep = rows != cols
+    A = coo_matrix((np.ones(keep.sum(), dtype=np.int), (rows[keep], cols[keep])), shape=(n, n)).tocsr()
+    
+    # Symetryzacja: i,j są sąsiadami, jeśli j jest w S[i,:] lub i jest w S[j,:]
+    G = A + A.T
+    G.data[:] = 1
+    
+    n_components, labels = connected_components(csgraph=G, directed=False, return_labels=True)
+    
+    if n_components > 1:
+        # Etykiety składowych są nadawane w kolejności pierwszego wystąpienia, więc pierwszy
+        # wierzchołek o etykiecie większej niż l to pierwsze miejsce, gdzie maksimum narastające przekracza l
+        j = np.searchsorted(np.maximum.accumulate(labels), np.arange(n_components - 1), side="right")
+        i = j - 1
+        B = coo_matrix((np.ones(j.shape[0], dtype=np.int), (i, j)), shape=(n, n)).tocsr()
+        G = G + B + B.T
+        G.data[:] = 1
+    
+    return G
+
+
+@profile_stage("Mnn_graph")
+def Mnn_graph(S, sparse=False, n_jobs=None):
     """
     Funkcja wyznacza macierz sąsiedztwa dla przyjmowanej macierzy S. 
     Dwa punkty i,j są uznawane za sąsiadów, jeśli istnieje takie u, 
@@ -71,6 +293,11 @@ def Mnn_graph(S):
     ------------------
     param:
     S - dwuwymiarowa macierz o wymiarach (n,m) i elementach naturalnych
+    sparse - jeśli True, macierz sąsiedztwa jest zwracana jako rzadka macierz csr_matrix
+    (pamięć O(n*m) zamiast O(n^2))
+    n_jobs - liczba wątków wypełniających bloki wierszy gęstej macierzy G 
+    (None - obliczenia sekwencyjne, -1 - wszystkie procesory); 
+    wersja rzadka jest w całości zwektoryzowana i nie korzysta z wątków
     ------------------
     return value:
     G - dwuwymiarow macierz o wymiarach (n,n) i elementach ze zbioru {0,1}, 
@@ -85,15 +312,23 @@ def Mnn_graph(S):
     elif S.dtype != np.int:
         raise TypeError("Wartości S są typu {0} a powinny być typu {1}".format(S.dtype, np.int))
     
+    if sparse:
+        return _mnn_graph_sparse(S)
+    
     n, m = S.shape
     G = np.zeros((n, n), dtype=np.int)
     
-    # Wypełenienie macierzy sąsiedztwa G
-    for i in range(n):
-        for j in range(i+1, n):
-            if np.any(S[i, :] == j) or np.any(S[j, :] == i):
-                G[i, j] = 1
-                G[j, i] = 1
+    # Wypełenienie macierzy sąsiedztwa G blokami wierszy: G[i,S[i,u]] = 1,
+    # każdy blok zapisuje tylko swoje wiersze
+    def fill_rows(start, stop):
+        rows = np.arange(start, stop)[:, np.newaxis]
+        G[rows, S[start:stop]] = 1
+    
+    _run_blocks(fill_rows, n, max(1, MNN_BLOCK_ELEMENTS // n), n_jobs)
+    
+    # Symetryzacja: i,j są sąsiadami, jeśli S[i,u] = j lub S[j,u] = i, bez pętli własnych
+    G |= G.T
+    np.fill_diagonal(G, 0)
     
     # Sprawdzenie czy graf G jest spójny
     # Źródło: https://docs.scipy.org/doc/scipy/reference/generated/scipy.sparse.csgraph.connected_components.html
@@ -117,7 +352,94 @@ def Mnn_graph(S):
         return G
 
 
-def Laplacian_eigen(G, k):
+def _laplacian(G, laplacian):
+    """
+    Funkcja wyznacza laplasjan (nieznormalizowany lub symetrycznie znormalizowany) 
+    macierzy sąsiedztwa G, zachowując jej reprezentację (gęstą lub rzadką).
+    Zwraca laplasjan oraz wektor stopni wierzchołków.
+    """
+    # Wyznaczenie wektora takiego, że d[i] = stopień i-tego wierzchołka G
+    d = np.asarray(G.sum(axis=1)).ravel()
+    
+    if issparse(G):
+        L = (diags(d) - G).astype(np.float)
+    else:
+        L = np.diag(d) - G
+    
+    # Dla L_rw wektory własne wyznaczane są z L_sym, z którym L_rw ma te same wartości własne
+    if laplacian in ("sym", "rw"):
+        d_inv_sqrt = 1 / np.sqrt(d)
+        if issparse(G):
+            L = diags(d_inv_sqrt) @ L @ diags(d_inv_sqrt)
+        else:
+            L = L * d_inv_sqrt[:, np.newaxis] * d_inv_sqrt[np.newaxis, :]
+    
+    return L, d
+
+
+def _smallest_eigen(L, k, solver):
+    """
+    Funkcja wyznacza k najmniejszych wartości własnych symetrycznej macierzy L 
+    i odpowiadające im wektory własne, posortowane rosnąco po wartościach własnych.
+    """
+    n = L.shape[0]
+    if solver == "eigh":
+        # Symetryczny solver gęsty, wyznaczający tylko wybrany zakres wartości własnych
+        L = L.toarray() if issparse(L) else L
+        w, v = eigh(L, subset_by_index=[0, k-1])
+    elif solver == "eigsh":
+        # Metoda Lanczosa w trybie shift-invert wokół sigma bliskiego 0
+        w, v = eigsh(csr_matrix(L, dtype=np.float), k=k, sigma=EIGSH_SIGMA, which="LM")
+    else:
+        # LOBPCG z prekondycjonerem Jacobiego (odwrotność diagonali L)
+        L = csr_matrix(L, dtype=np.float)
+        diagonal = L.diagonal()
+        diagonal[diagonal == 0] = 1
+        X0 = np.random.RandomState(0).rand(n, k)
+        w, v = lobpcg(L, X0, M=diags(1 / diagonal), largest=False, tol=1e-8, maxiter=n)
+    
+    order = np.argsort(w)
+    return w[order], v[:, order]
+
+
+def _laplacian_eigen(G, k, solver, laplacian):
+    """
+    Funkcja wyznacza wektory własne laplasjanu odpowiadające 2., 3., ..., (k+1) 
+    najmniejszej wartości własnej (zob. Laplacian_eigen()). Zwraca macierz wektorów 
+    własnych E, odpowiadające im wartości własne w oraz wektor stopni wierzchołków d.
+    """
+    if solver == "eig":
+        if issparse(G):
+            G = G.toarray()
+        
+        # Wyznaczenie laplasjanu grafu G
+        L, d = _laplacian(G, laplacian)
+
+        # Obliczenie wartości i wektorów własnych
+        w, v = np.linalg.eig(L) 
+        
+        # L_sym jest symetryczny, więc ewentualne części urojone pochodzą z błędów zaokrągleń
+        if laplacian != "unnormalized":
+            w, v = w.real, v.real
+        
+        # Posortowanie wyników po wartościach własnych i wybranie 
+        # odpowiednich wektorów własnych z posortowanej tablicy
+        E = v[:, np.argsort(w)][:, 1:(k+1)]
+        w = np.sort(w)[1:(k+1)]
+    else:
+        # Wyznaczenie tylko k+1 najmniejszych par własnych symetrycznego laplasjanu
+        L, d = _laplacian(G, laplacian)
+        w, v = _smallest_eigen(L, k+1, solver)
+        E, w = v[:, 1:(k+1)], w[1:(k+1)]
+    
+    if laplacian == "rw":
+        E = E / np.sqrt(d)[:, np.newaxis]
+    
+    return E, w, d
+
+
+@profile_stage("Laplacian_eigen")
+def Laplacian_eigen(G, k, solver="eig", laplacian="unnormalized"):
     """
     Funkcja wyznacza laplasjan L grafu reprezentowanego przez macierz G.
     Zwraca macierz, której kolumny składają się z wektorów własnych
@@ -125,7 +447,17 @@ def Laplacian_eigen(G, k):
     ------------------
     param:
     G - dwuwymiarowa macierz o wymiarach (n,n) i elementach ze zbioru {0,1}
+    (np.ndarray lub rzadka macierz scipy.sparse)
     k - drugi wymiar zwracanej macierzy (ilość zwracanych wektorów własnych) 
+    solver - metoda wyznaczania wektorów własnych:
+        "eig" - pełny rozkład niesymetryczny np.linalg.eig, O(n^3)
+        "eigh" - gęsty solver symetryczny wyznaczający tylko k+1 najmniejszych par własnych
+        "eigsh" - metoda Lanczosa (ARPACK) w trybie shift-invert dla macierzy rzadkiej
+        "lobpcg" - metoda LOBPCG z prekondycjonerem Jacobiego dla macierzy rzadkiej
+    laplacian - wariant laplasjanu:
+        "unnormalized" - L = D - G
+        "sym" - L_sym = D^(-1/2) L D^(-1/2)
+        "rw" - L_rw = D^(-1) L (wektory własne wyznaczane jako D^(-1/2) u, gdzie u to wektory L_sym)
     ------------------
     return value:
     E - dwuwymiarow macierz o wymiarach (n,k) której kolumny to kolejne wektory własne 
@@ -133,7 +465,7 @@ def Laplacian_eigen(G, k):
     """  
     
     # Sprawdzenie poprawności danych wejściowych
-    if type(G) != np.ndarray:
+    if type(G) != np.ndarray and not issparse(G):
         raise TypeError("Argument G był {0} a powinien być typu {1}".format(type(G), np.ndarray))
     elif G.ndim != 2:
         raise ValueError("Podana macierz G nie jest dwuwymiarowa.")
@@ -141,23 +473,49 @@ def Laplacian_eigen(G, k):
     if type(k) != int:
         raise TypeError("Argument k był {0} a powinien być typu {1}".format(type(k), int))  
     
-
-    # Wyznaczenie wektora takiego, że d[i] = stopień i-tego wierzchołka G
-    d = G.sum(axis=1)
-    # Wyznaczenie laplasjanu grafu G
-    L = np.diag(d) - G
-
-    # Obliczenie wartości i wektorów własnych
-    w, v = np.linalg.eig(L) 
+    _check_eigen_args(G.shape[0], k, solver, laplacian)
     
-    # Posortowanie wyników po wartościach własnych i wybranie 
-    # odpowiednich wektorów własnych z posortowanej tablicy
-    E = v[:, np.argsort(w)][:, 1:(k+1)]
+    E, _, _ = _laplacian_eigen(G, k, solver, laplacian)
     
     return E
 
 
-def spectral_clustering(X, k, M):
+def _check_eigen_args(n, k, solver, laplacian):
+    """Funkcja sprawdza poprawność metody solver i wariantu laplasjanu dla grafu o n wierzchołkach."""
+    if solver not in EIGEN_SOLVERS:
+        raise ValueError("Nieznana metoda {0}, dostępne metody to {1}.".format(solver, EIGEN_SOLVERS))
+    if laplacian not in LAPLACIAN_TYPES:
+        raise ValueError("Nieznany laplasjan {0}, dostępne warianty to {1}.".format(laplacian, LAPLACIAN_TYPES))
+    if solver != "eig" and k + 1 > n:
+        raise ValueError("Nie można wyznaczyć {0} wektorów własnych dla grafu o {1} wierzchołkach.".format(k+1, n))
+
+
+def _check_clustering_args(X, k, M):
+    """Funkcja sprawdza poprawność argumentów algorytmu spektralnego."""
+    if type(X) != np.ndarray:
+        raise TypeError("Argument G był {0} a powinien być typu {1}".format(type(X), np.ndarray))
+    elif X.ndim != 2:
+        raise ValueError("Podana macierz X nie jest dwuwymiarowa.")
+    if type(k) != int:
+        raise TypeError("Argument k był {0} a powinien być typu {1}".format(type(k), int))     
+    if type(M) != int:
+        raise TypeError("Argument M był {0} a powinien być typu {1}".format(type(M), int))
+
+    # Sprawdzenie, czy jest możliwy podział na zadaną ilość skupień
+    if k > X.shape[0]:
+        raise ValueError("Podana ilość skupień {0} jest większa niż ilość obserwacji {1}.".format(k, X.shape[0]))
+    if k <= 0:
+        raise ValueError("Podana ilość skupień musi być jest większa niż 0.")
+    
+    # Sprawdzenie, czy jest możliwe wyznaczenie M sąsiadów (niezależnie od metody w Mnn())
+    if M > X.shape[0] - 1:
+        raise ValueError("Ilość sąsiadów M = {0} jest większa niż ilość możliwych sąsiadów n = {1}.".format(M, X.shape[0]-1))
+    if M <= 0:
+        raise ValueError("Podana ilość sąsiadów musi być większa niż 0.")
+
+
+def spectral_clustering(X, k, M, method="dense", sparse=False, solver="eig", laplacian="unnormalized",
+                        n_jobs=None):
     """
     Funkcja implementująca algorymt spectralny, 
     polegający na zastosowaniu procedury k-średnich 
@@ -167,6 +525,11 @@ def spectral_clustering(X, k, M):
     X - dwuwymiarowa macierz o wymiarach (n,d) i elementach ze zbioru liczb rzeczywistych
     k - parametr ilości skupień
     M - parametr ilości najbliższych sąsiadów
+    method - metoda wyznaczania najbliższych sąsiadów (zob. Mnn())
+    sparse - czy macierz sąsiedztwa ma być budowana jako macierz rzadka (zob. Mnn_graph())
+    solver - metoda wyznaczania wektorów własnych laplasjanu (zob. Laplacian_eigen())
+    laplacian - wariant laplasjanu (zob. Laplacian_eigen())
+    n_jobs - liczba wątków dla wyznaczania sąsiadów i macierzy sąsiedztwa (zob. Mnn())
     ------------------
     return value:
     z - tablica określająca przynależność kolejnych punktów Xi do jednego z k skupień
@@ -174,39 +537,211 @@ def spectral_clustering(X, k, M):
     """
     
     try:
-        # Sprawdzenie poprawności danych wejściowych
-        if type(X) != np.ndarray:
-            raise TypeError("Argument G był {0} a powinien być typu {1}".format(type(X), np.ndarray))
-        elif X.ndim != 2:
-            raise ValueError("Podana macierz X nie jest dwuwymiarowa.")
-        if type(k) != int:
-            raise TypeError("Argument k był {0} a powinien być typu {1}".format(type(k), int))     
-        if type(M) != int:
-            raise TypeError("Argument M był {0} a powinien być typu {1}".format(type(M), int))
-
-        # Sprawdzenie, czy jest możliwy podział na zadaną ilość skupień
-        if k > X.shape[0]:
-            raise ValueError("Podana ilość skupień {0} jest większa niż ilość obserwacji {1}.".format(k, X.shape[0]))
-        if k <= 0:
-            raise ValueError("Podana ilość skupień musi być jest większa niż 0.")
+        # Błąd zapisywany jest w rekordzie etapu przed jego obsłużeniem (zob. profiling)
+        with stage("spectral_clustering") as s:
+            # Sprawdzenie poprawności danych wejściowych
+            _check_clustering_args(X, k, M)
 
-        # Wyznaczenie macierzy M-najbliższych sąsiadów
-        S = Mnn(X, M)
+            # Wyznaczenie macierzy M-najbliższych sąsiadów
+            S = Mnn(X, M, method, n_jobs=n_jobs)
         
-        # Wyznaczenie macierzy sąsiedztwa
-        G = Mnn_graph(S)
+            # Wyznaczenie macierzy sąsiedztwa
+            G = Mnn_graph(S, sparse, n_jobs)
         
-        # Wyznaczenie laplasjanu i jego wektorów własnych
-        E = Laplacian_eigen(G, k)
+            # Wyznaczenie laplasjanu i jego wektorów własnych
+            E = Laplacian_eigen(G, k, solver, laplacian)
         
-        # Zastosowanie algorytmu k-średnich
-        kmeans = KMeans(n_clusters=k, random_state=0).fit(E)
+            # Zastosowanie algorytmu k-średnich
+            with stage("KMeans", rows=E.shape[0]):
+                kmeans = KMeans(n_clusters=k, random_state=0).fit(E)
         
-        # Odczytanie ciągu takiego, że wartość z[i] oznacza do którego z k skupień należy punkt Xi
-        z = kmeans.labels_
+            # Odczytanie ciągu takiego, że wartość z[i] oznacza do którego z k skupień należy punkt Xi
+            z = kmeans.labels_
+            s.rows = z.shape[0]
         
-        return z
+            return z
     
     except Exception as e:
         print(e)
         return []
+
+
+def spectral_clustering_sweep(X, ks, Ms, method="auto", sparse=True, solver="eigsh", laplacian="unnormalized",
+                              n_jobs=None):
+    """
+    Funkcja wykonuje algorytm spektralny dla wszystkich par (k, M) z podanych list,
+    współdzieląc obliczenia pomiędzy konfiguracjami:
+    - najbliżsi sąsiedzi są wyznaczani raz dla max(Ms), a macierze dla mniejszych M 
+      powstają przez obcięcie kolumn (sąsiedzi są posortowani według odległości),
+    - dla każdego M wektory własne są wyznaczane raz dla max(ks), a dla mniejszych k 
+      wybierane są pierwsze kolumny.
+    W przeciwieństwie do spectral_clustering() wyjątki nie są przechwytywane.
+    ------------------
+    param:
+    X - dwuwymiarowa macierz o wymiarach (n,d) i elementach ze zbioru liczb rzeczywistych
+    ks - lista wartości parametru ilości skupień
+    Ms - lista wartości parametru ilości najbliższych sąsiadów
+    method, sparse, solver, laplacian, n_jobs - zob. spectral_clustering()
+    ------------------
+    return value:
+    results - ramka danych z wierszem dla każdej pary (k, M) i kolumnami: 
+    k, M, labels (etykiety skupień), knn_time (czas wspólnego wyznaczenia sąsiadów), 
+    graph_time, eigen_time (czasy wspólne dla danego M) oraz kmeans_time, w sekundach
+    """
+    ks = sorted(set(ks))
+    Ms = sorted(set(Ms))
+    if not ks or not Ms:
+        raise ValueError("Listy ks i Ms nie mogą być puste.")
+    for k in ks:
+        _check_clustering_args(X, k, Ms[-1])
+    for M in Ms:
+        _check_clustering_args(X, ks[-1], M)
+    _check_eigen_args(X.shape[0], ks[-1], solver, laplacian)
+    
+    start = time.perf_counter()
+    S_max = Mnn(X, Ms[-1], method, n_jobs=n_jobs)
+    knn_time = time.perf_counter() - start
+    
+    rows = []
+    for M in Ms:
+        start = time.perf_counter()
+        G = Mnn_graph(np.ascontiguousarray(S_max[:, :M]), sparse, n_jobs)
+        graph_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with stage("Laplacian_eigen", rows=G.shape[0]):
+            E_max, _, _ = _laplacian_eigen(G, ks[-1], solver, laplacian)
+        eigen_time = time.perf_counter() - start
+        
+        for k in ks:
+            start = time.perf_counter()
+            with stage("KMeans", rows=E_max.shape[0]):
+                labels = KMeans(n_clusters=k, random_state=0).fit(E_max[:, :k]).labels_
+            kmeans_time = time.perf_counter() - start
+            rows.append({"k": k, "M": M, "labels": labels, "knn_time": knn_time, "graph_time": graph_time,
+                         "eigen_time": eigen_time, "kmeans_time": kmeans_time})
+    
+    return pd.DataFrame(rows, columns=["k", "M", "labels", "knn_time", "graph_time", "eigen_time", "kmeans_time"])
+
+
+class SpectralClustering:
+    """
+    Klasa implementująca algorytm spektralny w stylu estymatora (fit / predict / transform).
+    Po dopasowaniu przechowuje indeks najbliższych sąsiadów, graf, wektory własne laplasjanu 
+    i model k-średnich, dzięki czemu nowe punkty mogą być przypisywane do skupień 
+    bez ponownego rozwiązywania zagadnienia własnego.
+    Nowe punkty są zanurzane rozszerzeniem Nyströma: dla punktu x o sąsiadach N(x) 
+    w zbiorze treningowym i wartości własnej lambda:
+        "unnormalized": e(x) = sum_{j in N(x)} e_j / (M - lambda)
+        "sym": e(x) = sum_{j in N(x)} e_j / sqrt(M * d_j) / (1 - lambda)
+        "rw": e(x) = sum_{j in N(x)} e_j / M / (1 - lambda)
+    ------------------
+    param:
+    k - parametr ilości skupień
+    M - parametr ilości najbliższych sąsiadów
+    method - metoda wyznaczania najbliższych sąsiadów (zob. Mnn())
+    sparse - czy macierz sąsiedztwa ma być budowana jako macierz rzadka (zob. Mnn_graph())
+    solver - metoda wyznaczania wektorów własnych laplasjanu (zob. Laplacian_eigen())
+    laplacian - wariant laplasjanu (zob. Laplacian_eigen())
+    eps - tolerancja przybliżenia dla metody "approx"
+    n_jobs - liczba wątków dla wyznaczania sąsiadów i macierzy sąsiedztwa (zob. Mnn())
+    """
+
+    def __init__(self, k, M, method="auto", sparse=True, solver="eigsh", laplacian="unnormalized", eps=1.0,
+                 n_jobs=None):
+        self.k = k
+        self.M = M
+        self.method = method
+        self.sparse = sparse
+        self.solver = solver
+        self.laplacian = laplacian
+        self.eps = eps
+        self.n_jobs = n_jobs
+
+    def fit(self, X):
+        """
+        Metoda dopasowuje model do macierzy X o wymiarach (n,d).
+        W przeciwieństwie do spectral_clustering() wyjątki nie są przechwytywane.
+        ------------------
+        return value:
+        self - dopasowany model z atrybutami X_, tree_, S_, G_, degrees_, 
+        eigenvalues_, embedding_, kmeans_, labels_
+        """
+        _check_clustering_args(X, self.k, self.M)
+        if self.method not in MNN_METHODS:
+            raise ValueError("Nieznana metoda {0}, dostępne metody to {1}.".format(self.method, MNN_METHODS))
+        _check_eigen_args(X.shape[0], self.k, self.solver, self.laplacian)
+        
+        X = X.astype(np.float) if X.dtype != np.float else X
+        method = self.method
+        if method == "auto":
+            method = "kd_tree" if X.shape[1] <= MNN_AUTO_TREE_MAX_DIM else "brute"
+        
+        # Indeks sąsiadów budujemy raz i używamy go zarówno do S, jak i do nowych punktów
+        self.X_ = X
+        if method in ("kd_tree", "ball_tree", "approx"):
+            with stage("Mnn", rows=X.shape[0]):
+                self.tree_ = _build_tree(X, method)
+                self.S_ = _mnn_tree(X, self.M, method, self.eps if method == "approx" else 0.0, self.tree_,
+                                    self.n_jobs)
+        else:
+            self.tree_ = None
+            self.S_ = Mnn(X, self.M, method, n_jobs=self.n_jobs)
+        
+        self.G_ = Mnn_graph(self.S_, self.sparse, self.n_jobs)
+        with stage("Laplacian_eigen", rows=X.shape[0]):
+            self.embedding_, self.eigenvalues_, self.degrees_ = _laplacian_eigen(self.G_, self.k, self.solver,
+                                                                                 self.laplacian)
+        with stage("KMeans", rows=X.shape[0]):
+            self.kmeans_ = KMeans(n_clusters=self.k, random_state=0).fit(self.embedding_)
+        self.labels_ = self.kmeans_.labels_
+        return self
+
+    def _neighbors(self, Y):
+        """Metoda wyznacza M najbliższych sąsiadów w zbiorze treningowym dla wierszy Y."""
+        if self.tree_ is not None:
+            eps = self.eps if self.method == "approx" else 0.0
+            return _query_tree(self.tree_, Y, self.M, eps, self.n_jobs)
+        return _knn_brute(self.X_, Y, self.M, n_jobs=self.n_jobs)
+
+    def transform(self, Y):
+        """
+        Metoda zanurza punkty Y o wymiarach (m,d) w przestrzeń wektorów własnych 
+        rozszerzeniem Nyströma.
+        ------------------
+        return value:
+        E - dwuwymiarowa macierz o wymiarach (m,k)
+        """
+        if not hasattr(self, "kmeans_"):
+            raise ValueError("Model nie został dopasowany, należy najpierw wywołać fit().")
+        if type(Y) != np.ndarray:
+            raise TypeError("Argument Y był {0} a powinien być typu {1}".format(type(Y), np.ndarray))
+        elif Y.ndim != 2 or Y.shape[1] != self.X_.shape[1]:
+            raise ValueError("Podana macierz Y powinna mieć wymiary (m,{0}).".format(self.X_.shape[1]))
+        
+        Y = Y.astype(np.float) if Y.dtype != np.float else Y
+        I = self._neighbors(Y)
+        w = self.eigenvalues_
+        
+        if self.laplacian == "unnormalized":
+            return self.embedding_[I].sum(axis=1) / (self.M - w)[np.newaxis, :]
+        elif self.laplacian == "sym":
+            U = self.embedding_ / np.sqrt(self.degrees_)[:, np.newaxis]
+            return U[I].sum(axis=1) / np.sqrt(self.M) / (1 - w)[np.newaxis, :]
+        else:
+            return self.embedding_[I].sum(axis=1) / self.M / (1 - w)[np.newaxis, :]
+
+    def predict(self, Y):
+        """
+        Metoda przypisuje punkty Y o wymiarach (m,d) do jednego z k skupień.
+        ------------------
+        return value:
+        z - tablica określająca przynależność kolejnych punktów Yi do jednego z k skupień
+        """
+        # transform() sprawdza, czy model został dopasowany, zanim użyjemy kmeans_
+        E = self.transform(Y)
+        return self.kmeans_.predict(E)
+
+    def fit_predict(self, X):
+        """Metoda dopasowuje model do macierzy X i zwraca etykiety jej punktów."""
+        return self.fit(X).labels_
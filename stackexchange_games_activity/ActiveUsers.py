@@ -1,26 +1,114 @@
+import io
 import os
+import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from dateutil.parser import parse
 
+from _profiling_compat import profile_stage
 
-def read_dataframes(name):
-    """Funkcja wczytuje ramki danych z plików csv w folderze name."""
+# Format dat w zrzutach Stack Exchange, np. 2020-01-31T12:34:56.789 lub 2020-01-31T12:34:56
+# (ISO 8601, ułamki sekund są opcjonalne)
+DATE_FORMAT = "ISO8601"
+
+# Kolumny wykorzystywane w analizie aktywności oraz ich typy (identyfikatory z brakami są typu float)
+USECOLS = {
+    "Posts": ["Id", "PostTypeId", "CreationDate", "OwnerUserId"],
+    "Users": ["Id", "CreationDate", "LastAccessDate", "DisplayName"],
+    "Comments": ["Id", "UserId", "CreationDate"],
+}
+DTYPES = {
+    "Posts": {"Id": "int64", "PostTypeId": "int64", "OwnerUserId": "float64"},
+    "Users": {"Id": "int64", "DisplayName": "object"},
+    "Comments": {"Id": "int64", "UserId": "float64"},
+}
+
+# Plik z zapisanymi zagregowanymi statystykami aktywności, jego pierwszy wiersz (zaczynający się od
+# ACTIVITY_MARKS_PREFIX) zawiera w formacie JSON znaczniki ostatnich wczytanych wierszy tabel
+ACTIVITY_FILE = "Activity.csv"
+ACTIVITY_MARKS_PREFIX = "# "
+ACTIVITY_COLUMNS = ["UserId", "Year", "TotalPosts", "TotalQuestions", "TotalAnswers", "TotalComments"]
+
+# Liczba ostatnich bajtów wczytanej części pliku zapisywanych w znaczniku, zob. read_new_rows()
+MARK_TAIL_BYTES = 256
+
+# Wczytane zbiory danych serwisów, zob. load_dataset()
+_datasets = {}
+
+
+def parse_date_column(col):
+    """Funkcja zamienia kolumnę dat w formacie DATE_FORMAT na typ datetime64 (jeśli nie jest już tego typu)."""
+
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    return pd.to_datetime(col, format=DATE_FORMAT)
+
+
+@profile_stage("read_dataframes", rows=lambda frames: sum(df.shape[0] for df in frames))
+def read_dataframes(name, parse_dates=False, selected=False):
+    """
+    Funkcja wczytuje ramki danych z plików csv w folderze name.
+    Dla parse_dates=True kolumny z datami są od razu zamieniane na typ datetime64.
+    Dla selected=True wczytywane są tylko kolumny z USECOLS o typach z DTYPES.
+    """
 
     folder_boardgames = os.path.join("..", "data", name)
-    Posts = pd.read_csv(os.path.join(folder_boardgames, "Posts.xml.csv"))
-    Users = pd.read_csv(os.path.join(folder_boardgames, "Users.xml.csv"))
-    Comments = pd.read_csv(os.path.join(folder_boardgames, "Comments.xml.csv"))
+
+    def read(table):
+        path = os.path.join(folder_boardgames, table + ".xml.csv")
+        if selected:
+            return pd.read_csv(path, usecols=USECOLS[table], dtype=DTYPES[table])
+        return pd.read_csv(path)
+
+    Posts = read("Posts")
+    Users = read("Users")
+    Comments = read("Comments")
+    if parse_dates:
+        Posts["CreationDate"] = parse_date_column(Posts["CreationDate"])
+        Users["CreationDate"] = parse_date_column(Users["CreationDate"])
+        Users["LastAccessDate"] = parse_date_column(Users["LastAccessDate"])
+        Comments["CreationDate"] = parse_date_column(Comments["CreationDate"])
     return Posts, Users, Comments
 
 
+def load_dataset(name):
+    """
+    Funkcja zwraca ramki Posts, Users i Comments serwisu name, wczytując je tylko raz 
+    (tylko kolumny z USECOLS, z datami typu datetime64). Kolejne wywołania zwracają 
+    zapamiętane ramki, więc nie należy ich modyfikować w miejscu.
+    Po zmianie plików csv należy wywołać clear_dataset_cache().
+    """
+
+    if name not in _datasets:
+        _datasets[name] = read_dataframes(name, parse_dates=True, selected=True)
+    return _datasets[name]
+
+
+def read_users(name):
+    """Funkcja wczytuje tylko tabelę Users serwisu name (kolumny z USECOLS)."""
+
+    path = os.path.join("..", "data", name, "Users.xml.csv")
+    return pd.read_csv(path, usecols=USECOLS["Users"], dtype=DTYPES["Users"])
+
+
+def clear_dataset_cache(name=None):
+    """Funkcja usuwa z pamięci wczytany zbiór danych serwisu name lub wszystkie zbiory (name=None)."""
+
+    if name is None:
+        _datasets.clear()
+    else:
+        _datasets.pop(name, None)
+
+
+@profile_stage("unpack_date")
 def unpack_date(df):
-    """Funkcja parsuje datę i rozbija ją na 3 kolumny: rok, miesiąc i dzień."""
+    """Funkcja parsuje datę do typu datetime64 i rozbija ją na 3 kolumny: rok, miesiąc i dzień."""
 
-    df["CreationDate"] = df["CreationDate"].apply(lambda x: (parse(x).year, parse(x).month, parse(x).day))
-    df["CreationYear"] = df["CreationDate"].apply(lambda x: x[0])
-    df["CreationMonth"] = df["CreationDate"].apply(lambda x: x[1])
-    df["CreationDay"] = df["CreationDate"].apply(lambda x: x[2])
+    dates = parse_date_column(df["CreationDate"])
+    df["CreationDate"] = dates
+    df["CreationYear"] = dates.dt.year.astype("int64")
+    df["CreationMonth"] = dates.dt.month.astype("int64")
+    df["CreationDay"] = dates.dt.day.astype("int64")
     return df
 
 
@@ -47,67 +135,220 @@ def filter_by_year(posts, year):
     return posts.loc[posts.CreationYear >= year]
 
 
-def set_user_id(row):
-    """Funkcja określa ID usera na podstawie 2 kolumn, które mogą mieć wartości 0 (czyli brak ID)"""
-
-    val = 0
-    if row.OwnerUserId == 0:
-        val = row.UserId
-    else:
-        val = row.OwnerUserId
-    return val
-
+def activity_keys(posts, comments):
+    """
+    Funkcja łączy posty i komentarze w jedną listę aktywności. Zwraca tablice: Id użytkowników, 
+    lat aktywności i rodzajów aktywności (0 - pytanie, 1 - odpowiedź, 2 - inny post, 3 - komentarz).
+    Komentarze bez użytkownika są pomijane.
+    """
 
-def calculate_activity(row):
-    """Funkcja oblicza całkowitą aktywność na podstawie ilości pytań, odpowiedzi i komentarzy"""
-
-    val = row.TotalQuestions + row.TotalAnswers + row.TotalComments
-    return val
+    comments = comments.dropna(subset=["UserId"])
+    post_kind = np.select([posts.PostTypeId == 1, posts.PostTypeId == 2], [0, 1], default=2)
+    keys = np.concatenate([posts.OwnerUserId.to_numpy(dtype=float), comments.UserId.to_numpy(dtype=float)])
+    years = np.concatenate([posts.CreationYear.to_numpy(), comments.CreationYear.to_numpy()])
+    kinds = np.concatenate([post_kind, np.full(comments.shape[0], 3)])
+    return keys, years, kinds
 
 
+@profile_stage("merge_activity")
 def merge_activity(posts, comments):
     """Funkcja oblicza ilość danej aktywności dla każdego użytkownika i łączy ramki danych"""
 
-    questions = posts[posts.PostTypeId == 1]
-    answers = posts[posts.PostTypeId == 2]
-
-    df_total = pd.DataFrame(posts.groupby(["OwnerUserId"]).size(), columns=["TotalPosts"]).reset_index()
-    df_questions = pd.DataFrame(questions.groupby(["OwnerUserId"]).size(), columns=["TotalQuestions"]).reset_index()
-    df_answers = pd.DataFrame(answers.groupby(["OwnerUserId"]).size(), columns=["TotalAnswers"]).reset_index()
-    df_comments = pd.DataFrame(comments.groupby(["UserId"]).size(), columns=["TotalComments"]).reset_index()
-
-    df = df_total.merge(df_questions, how="left", left_on="OwnerUserId", right_on="OwnerUserId")
-    df = df.merge(df_answers, how="left", left_on="OwnerUserId", right_on="OwnerUserId")
-    df = df.merge(df_comments, how='outer', left_on="OwnerUserId", right_on="UserId")
-    df.fillna(0, inplace=True)
-
-    df["UserId"] = df.apply(lambda row: set_user_id(row), axis=1)
+    keys, _, kinds = activity_keys(posts, comments)
+
+    # Zliczenie wszystkich aktywności w jednym przejściu, użytkownicy posortowani rosnąco po Id
+    codes, user_ids = pd.factorize(keys, sort=True)
+    counts = np.bincount(codes * 4 + kinds, minlength=4 * len(user_ids)).reshape(-1, 4).astype(float)
+
+    total_posts = counts[:, 0] + counts[:, 1] + counts[:, 2]
+
+    # Kolejność wierszy jak w złączeniu zewnętrznym: najpierw autorzy postów, potem pozostali komentujący
+    order = np.lexsort((user_ids, total_posts == 0))
+    counts, user_ids, total_posts = counts[order], user_ids[order], total_posts[order]
+
+    df = pd.DataFrame({
+        "OwnerUserId": np.where(total_posts > 0, user_ids, 0),
+        "TotalPosts": total_posts,
+        "TotalQuestions": counts[:, 0],
+        "TotalAnswers": counts[:, 1],
+        "UserId": user_ids,
+        "TotalComments": counts[:, 3],
+    })
+
+    # Typy kolumn jak po złączeniach zewnętrznych: kolumna jest typu float tylko wtedy,
+    # gdy złączenie dałoby w niej braki (uzupełniane zerami), w przeciwnym razie int64
+    only_comments = total_posts == 0
+    posters = counts[~only_comments]
+    missing = {
+        "TotalPosts": only_comments.any(),
+        "TotalQuestions": only_comments.any() or (posters[:, 0] == 0).any(),
+        "TotalAnswers": only_comments.any() or (posters[:, 1] == 0).any(),
+        "TotalComments": (posters[:, 3] == 0).any(),
+    }
+    df = df.astype({column: "int64" for column, is_missing in missing.items() if not is_missing})
 
     return df
 
 
-def create_activity_df(collection_name):
-    """Funkcja tworzy ramkę danych z aktywnością użytkowników w roku 2020."""
-
-    Posts, Users, Comments = read_dataframes(collection_name)
+def count_activity_by_year(posts, comments):
+    """Funkcja oblicza ilość danej aktywności dla każdego użytkownika w każdym roku."""
+
+    keys, years, kinds = activity_keys(posts, comments)
+    df = pd.DataFrame({"UserId": keys, "Year": years, "Kind": kinds})
+    counts = df.groupby(["UserId", "Year", "Kind"]).size().unstack("Kind", fill_value=0)
+    counts = counts.reindex(columns=range(4), fill_value=0).reset_index()
+    counts["TotalPosts"] = counts[0] + counts[1] + counts[2]
+    counts = counts.rename(columns={0: "TotalQuestions", 1: "TotalAnswers", 3: "TotalComments"})
+    return counts[ACTIVITY_COLUMNS]
+
+
+def empty_table(table):
+    """Funkcja zwraca pustą ramkę danych z kolumnami USECOLS tabeli table."""
+
+    return pd.DataFrame({column: pd.Series(dtype=DTYPES[table].get(column, "object")) for column in USECOLS[table]})
+
+
+def read_new_rows(name, table, mark=None, chunksize=100000):
+    """
+    Funkcja wczytuje kawałkami kolumny USECOLS tabeli table serwisu name i zwraca tylko wiersze 
+    o Id większym niż zapisane w znaczniku mark, wraz z nowym znacznikiem (zob. update_activity()).
+    Znacznik zawiera też rozmiar wczytanej części pliku, jego nagłówek i ostatnie bajty. Jeśli plik 
+    nadal zaczyna się od tej części (nowy zrzut jedynie dopisał wiersze), odczyt zaczyna się od 
+    zapamiętanego miejsca, więc koszt odczytu zależy tylko od liczby nowych wierszy. W przeciwnym razie 
+    (np. inne kolumny w nowym zrzucie) wczytywany jest cały plik.
+    """
+
+    path = os.path.join("..", "data", name, table + ".xml.csv")
+    mark = mark or {"Id": -1}
+    size = os.path.getsize(path)
+
+    with open(path, "rb") as f:
+        header = f.readline()
+        offset = mark.get("offset")
+        tail = bytes.fromhex(mark.get("tail", ""))
+        resume = offset is not None and mark.get("header") == header.hex() and len(header) <= offset <= size
+        if resume:
+            f.seek(offset - len(tail))
+            resume = f.read(len(tail)) == tail
+
+        if resume and offset == size:
+            new_rows = empty_table(table)
+        else:
+            options = {"usecols": USECOLS[table], "dtype": DTYPES[table], "chunksize": chunksize}
+            if resume:
+                options.update(header=None, names=pd.read_csv(io.BytesIO(header), nrows=0).columns)
+            else:
+                f.seek(0)
+            chunks = [chunk[chunk.Id > mark["Id"]] for chunk in pd.read_csv(f, **options)]
+            new_rows = pd.concat(chunks, ignore_index=True)[USECOLS[table]] if chunks else empty_table(table)
+
+        f.seek(max(len(header), size - MARK_TAIL_BYTES))
+        new_mark = {"Id": int(max(mark["Id"], new_rows.Id.to_numpy().max(initial=-1))), "offset": size,
+                    "header": header.hex(), "tail": f.read(size - f.tell()).hex()}
+    return new_rows, new_mark
+
+
+def read_activity(path):
+    """
+    Funkcja wczytuje statystyki aktywności i znaczniki zapisane przez write_activity().
+    Dla pliku bez znaczników zwraca (None, None).
+    """
+
+    with open(path) as f:
+        first = f.readline()
+        if not first.startswith(ACTIVITY_MARKS_PREFIX):
+            return None, None
+        marks = json.loads(first[len(ACTIVITY_MARKS_PREFIX):])
+        return pd.read_csv(f), marks
+
+
+def write_activity(path, activity, marks):
+    """
+    Funkcja zapisuje statystyki aktywności i znaczniki w jednym pliku path. Plik jest zapisywany 
+    pod nazwą tymczasową i podmieniany w całości, więc przerwany zapis nie zmienia poprzednich 
+    statystyk, a statystyki zawsze odpowiadają znacznikom.
+    """
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        f.write(ACTIVITY_MARKS_PREFIX + json.dumps(marks) + "\n")
+        activity.to_csv(f, index=False, lineterminator="\n")
+    os.replace(tmp_path, path)
+
+
+def update_activity(collection_name, rebuild=False, chunksize=100000):
+    """
+    Funkcja aktualizuje zapisane w folderze serwisu statystyki aktywności użytkowników w latach 
+    (plik ACTIVITY_FILE) na podstawie nowych wierszy Posts i Comments. Dla każdej tabeli 
+    zapamiętywane jest największe wczytane Id i miejsce w pliku (zob. read_new_rows()), więc kolejne 
+    wywołanie wczytuje i agreguje tylko wiersze dodane w nowym zrzucie. Zakładamy, że nowy zrzut 
+    jedynie dopisuje wiersze. Dla rebuild=True statystyki są liczone od nowa.
+    Zwraca ramkę danych z kolumnami ACTIVITY_COLUMNS.
+    """
+
+    activity_path = os.path.join("..", "data", collection_name, ACTIVITY_FILE)
+
+    stored, marks = None, None
+    if not rebuild and os.path.exists(activity_path):
+        stored, marks = read_activity(activity_path)
+    if marks is None:
+        stored = pd.DataFrame(columns=ACTIVITY_COLUMNS)
+        marks = {"Posts": None, "Comments": None}
+
+    new_posts, posts_mark = read_new_rows(collection_name, "Posts", marks["Posts"], chunksize)
+    new_comments, comments_mark = read_new_rows(collection_name, "Comments", marks["Comments"], chunksize)
+    new_marks = {"Posts": posts_mark, "Comments": comments_mark}
+
+    activity = stored
+    if new_posts.shape[0] > 0 or new_comments.shape[0] > 0:
+        delta = count_activity_by_year(prepare_posts(new_posts), prepare_comments(new_comments))
+        activity = pd.concat([stored, delta], ignore_index=True).astype({c: "int64" for c in ACTIVITY_COLUMNS[1:]})
+        activity = activity.groupby(["UserId", "Year"], as_index=False).sum()
+    if activity is not stored or new_marks != marks:
+        write_activity(activity_path, activity, new_marks)
+    return activity
+
+
+def create_activity_df(collection_name, year=2020, incremental=False):
+    """
+    Funkcja tworzy ramkę danych z aktywnością użytkowników od podanego roku (domyślnie 2020).
+    Dla incremental=True aktywność jest wyznaczana z zapisanych statystyk aktualizowanych 
+    tylko o nowe wiersze (zob. update_activity()).
+    """
+
+    if incremental:
+        activity = update_activity(collection_name)
+        activity = activity[activity.Year >= year].groupby("UserId", as_index=False).sum()
+        df_activity = activity[["TotalPosts", "TotalQuestions", "TotalAnswers", "UserId", "TotalComments"]]
+        df_activity = df_activity.astype(float)
+        df_activity["TotalActivity"] = df_activity.TotalQuestions + df_activity.TotalAnswers + df_activity.TotalComments
+        return df_activity.sort_values("TotalActivity", axis=0, ascending=False)
+
+    Posts, Users, Comments = load_dataset(collection_name)
     posts = prepare_posts(Posts)
-    posts = filter_by_year(posts, 2020)
+    posts = filter_by_year(posts, year)
     comments = prepare_comments(Comments)
-    comments = filter_by_year(comments, 2020)
+    comments = filter_by_year(comments, year)
     df_activity = merge_activity(posts, comments)
     df_activity.drop("OwnerUserId", inplace=True, axis=1)
-    df_activity["TotalActivity"] = df_activity.apply(lambda row: calculate_activity(row), axis=1)
+    df_activity["TotalActivity"] = df_activity.TotalQuestions + df_activity.TotalAnswers + df_activity.TotalComments
     df_activity = df_activity.sort_values("TotalActivity", axis=0, ascending=False)
     return df_activity
 
 
-def get_users(collection_name):
-    """Funkcja tworzy ramkę danych dla użytkowników i związanych z nimi dat."""
+def get_users(collection_name, Users=None):
+    """
+    Funkcja tworzy ramkę danych dla użytkowników i związanych z nimi dat.
+    Domyślnie ramka Users pochodzi z load_dataset().
+    """
 
-    Posts, Users, Comments = read_dataframes(collection_name)
-    users = Users[["Id", "CreationDate", "LastAccessDate", "DisplayName"]]
-    users["LastAccessYear"] = users["LastAccessDate"].apply(lambda x: parse(x).year)
-    users["CreationYear"] = users["CreationDate"].apply(lambda x: parse(x).year)
+    if Users is None:
+        Posts, Users, Comments = load_dataset(collection_name)
+    users = Users[["Id", "CreationDate", "LastAccessDate", "DisplayName"]].copy()
+    users["LastAccessDate"] = parse_date_column(users["LastAccessDate"])
+    users["CreationDate"] = parse_date_column(users["CreationDate"])
+    users["LastAccessYear"] = users["LastAccessDate"].dt.year.astype("int64")
+    users["CreationYear"] = users["CreationDate"].dt.year.astype("int64")
     users["ActiveYears"] = users["LastAccessYear"] - users["CreationYear"] + 1
     return users
 
@@ -133,17 +374,85 @@ def get_percentage_of_active_users(users, year=2020):
     return p
 
 
-def get_ranking(collection_name):
-    """Funkcja tworzy ranking aktywnych użytkowników w 2020 roku dla danego serwisu."""
-
-    activity_df = create_activity_df(collection_name)
-    users = get_users(collection_name)
-    ranking = activity_df.merge(users, how='left', left_on='UserId', right_on='Id')
-    ranking = ranking.sort_values("TotalActivity", axis=0, ascending=False)
-    ranking = ranking[
-        ["UserId", "DisplayName", "CreationYear", "ActiveYears", "TotalActivity", "TotalQuestions", "TotalAnswers",
-         "TotalComments"]].head(10)
-    return ranking
+def stored_activity_keys(activity):
+    """
+    Funkcja zamienia statystyki aktywności w latach (zob. update_activity()) na tablice jak w activity_keys()
+    oraz tablicę wag, czyli liczb aktywności danego rodzaju.
+    """
+
+    n = activity.shape[0]
+    keys = np.tile(activity.UserId.to_numpy(dtype=float), 4)
+    years = np.tile(activity.Year.to_numpy(dtype="int64"), 4)
+    kinds = np.repeat(np.arange(4), n)
+    other_posts = activity.TotalPosts - activity.TotalQuestions - activity.TotalAnswers
+    weights = np.concatenate([activity.TotalQuestions, activity.TotalAnswers, other_posts,
+                              activity.TotalComments]).astype(float)
+    return keys, years, kinds, weights
+
+
+def get_rankings(collection_names, years, top=10, incremental=False):
+    """
+    Funkcja tworzy rankingi top najaktywniejszych użytkowników dla każdego serwisu i roku.
+    Tak jak w get_ranking() ranking dla roku Y uwzględnia aktywność od roku Y włącznie.
+    Aktywność każdego serwisu jest zliczana w jednym przejściu dla wszystkich lat,
+    najlepsi użytkownicy wybierani są bez sortowania całej ramki (nlargest), 
+    a dane użytkowników dołączane są tylko do wybranych wierszy.
+    Dla incremental=True aktywność pochodzi z zapisanych statystyk w latach aktualizowanych 
+    tylko o nowe wiersze (zob. update_activity()), a z plików wczytywana jest jedynie tabela Users.
+    Zwraca jedną ramkę danych w formacie długim z kolumnami Site, Year, Rank i kolumnami rankingu.
+    """
+
+    columns = ["UserId", "DisplayName", "CreationYear", "ActiveYears", "TotalActivity", "TotalQuestions",
+               "TotalAnswers", "TotalComments"]
+    rankings = []
+    for name in collection_names:
+        if incremental:
+            keys, activity_years, kinds, weights = stored_activity_keys(update_activity(name))
+            users = get_users(name, read_users(name))
+        else:
+            Posts, Users, Comments = load_dataset(name)
+            keys, activity_years, kinds = activity_keys(prepare_posts(Posts), prepare_comments(Comments))
+            weights = None
+            users = get_users(name)
+
+        # Zliczenie aktywności w tablicy (użytkownik, rok, rodzaj aktywności)
+        first_year = min(activity_years.min(initial=min(years)), min(years))
+        last_year = max(activity_years.max(initial=max(years)), max(years))
+        n_years = last_year - first_year + 1
+        codes, user_ids = pd.factorize(keys, sort=True)
+        counts = np.bincount((codes * n_years + activity_years - first_year) * 4 + kinds, weights=weights,
+                             minlength=len(user_ids) * n_years * 4).reshape(len(user_ids), n_years, 4)
+
+        # Sumy od końca: since[:, y] to aktywność od roku first_year + y włącznie
+        since = counts[:, ::-1, :].cumsum(axis=1)[:, ::-1, :].astype(float)
+
+        for year in years:
+            c = since[:, year - first_year, :]
+            activity = pd.DataFrame({
+                "UserId": user_ids,
+                "TotalActivity": c[:, 0] + c[:, 1] + c[:, 3],
+                "TotalQuestions": c[:, 0],
+                "TotalAnswers": c[:, 1],
+                "TotalComments": c[:, 3],
+            })
+            activity = activity[activity.TotalActivity > 0].nlargest(top, "TotalActivity")
+            ranking = activity.merge(users, how="left", left_on="UserId", right_on="Id")[columns]
+            ranking.insert(0, "Rank", np.arange(1, ranking.shape[0] + 1))
+            ranking.insert(0, "Year", year)
+            ranking.insert(0, "Site", name)
+            rankings.append(ranking)
+
+    return pd.concat(rankings, ignore_index=True)
+
+
+def get_ranking(collection_name, year=2020, incremental=False):
+    """
+    Funkcja tworzy ranking aktywnych użytkowników od podanego roku (domyślnie 2020) dla danego serwisu.
+    Dla incremental=True zob. get_rankings().
+    """
+
+    ranking = get_rankings([collection_name], [year], incremental=incremental)
+    return ranking.drop(columns=["Site", "Year", "Rank"])
 
 
 
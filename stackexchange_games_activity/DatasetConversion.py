@@ -1,29 +1,262 @@
 import xml.etree.ElementTree as ET
 import pandas as pd
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from _profiling_compat import profile_stage, stage
+
+# Kolumny usuwane z poszczególnych tabel podczas konwersji
+DELCOLS = {
+    "Badges": [],
+    "PostLinks": [],
+    "Posts": ["Body", "Tags", "OwnerDisplayName", "LastEditorDisplayName"],
+    "Tags": [],
+    "Users": ["AboutMe", "WebsiteUrl", "ProfileImageUrl"],
+    "Votes": [],
+    "Comments": ["Text", "UserDisplayName"],
+    "PostHistory": [],
+}
+
+# Nazwy typów pyarrow (zob. pyarrow.type_for_alias()), pyarrow jest importowany dopiero
+# przy konwersji do formatu kolumnowego, więc konwersja do CSV go nie wymaga
+_INT = "int64"
+_DATE = "timestamp[ms]"
+_STR = "string"
+
+# Typy kolumn tabel zrzutu Stack Exchange
+# Źródło: https://meta.stackexchange.com/questions/2677/database-schema-documentation-for-the-public-data-dump-and-sede
+SCHEMAS = {
+    "Badges": [("Id", _INT), ("UserId", _INT), ("Name", _STR), ("Date", _DATE), ("Class", _INT),
+               ("TagBased", "bool")],
+    "PostLinks": [("Id", _INT), ("CreationDate", _DATE), ("PostId", _INT), ("RelatedPostId", _INT),
+                  ("LinkTypeId", _INT)],
+    "Posts": [("Id", _INT), ("PostTypeId", _INT), ("AcceptedAnswerId", _INT), ("ParentId", _INT),
+              ("CreationDate", _DATE), ("DeletionDate", _DATE), ("Score", _INT), ("ViewCount", _INT),
+              ("Body", _STR), ("OwnerUserId", _INT), ("OwnerDisplayName", _STR), ("LastEditorUserId", _INT),
+              ("LastEditorDisplayName", _STR), ("LastEditDate", _DATE), ("LastActivityDate", _DATE),
+              ("Title", _STR), ("Tags", _STR), ("AnswerCount", _INT), ("CommentCount", _INT),
+              ("FavoriteCount", _INT), ("ClosedDate", _DATE), ("CommunityOwnedDate", _DATE),
+              ("ContentLicense", _STR)],
+    "Tags": [("Id", _INT), ("TagName", _STR), ("Count", _INT), ("ExcerptPostId", _INT), ("WikiPostId", _INT)],
+    "Users": [("Id", _INT), ("Reputation", _INT), ("CreationDate", _DATE), ("DisplayName", _STR),
+              ("LastAccessDate", _DATE), ("WebsiteUrl", _STR), ("Location", _STR), ("AboutMe", _STR),
+              ("Views", _INT), ("UpVotes", _INT), ("DownVotes", _INT), ("ProfileImageUrl", _STR),
+              ("EmailHash", _STR), ("AccountId", _INT), ("Age", _INT)],
+    "Votes": [("Id", _INT), ("PostId", _INT), ("VoteTypeId", _INT), ("UserId", _INT), ("CreationDate", _DATE),
+              ("BountyAmount", _INT)],
+    "Comments": [("Id", _INT), ("PostId", _INT), ("Score", _INT), ("Text", _STR), ("CreationDate", _DATE),
+                 ("UserDisplayName", _STR), ("UserId", _INT), ("ContentLicense", _STR)],
+    "PostHistory": [("Id", _INT), ("PostHistoryTypeId", _INT), ("PostId", _INT), ("RevisionGUID", _STR),
+                    ("CreationDate", _DATE), ("UserId", _INT), ("UserDisplayName", _STR), ("Comment", _STR),
+                    ("Text", _STR), ("ContentLicense", _STR)],
+}
+
+# Domyślna liczba wierszy zapisywanych w jednej partii
+BATCH_SIZE = 100000
 
 
 def xml2csv(fname, delcols=[]):
     """
     Funkcja konwertuje oryginalne zbiory XML na CSV.
+    Plik CSV jest zapisywany pod nazwą tymczasową i zastępuje plik wynikowy dopiero po udanym zapisie.
     Źródło: http://www.gagolewski.com/resources/data/travel_stackexchange_com/readme.txt
     """
-    tree = ET.parse(fname)
-    root = tree.getroot()
-    d = pd.DataFrame([e.attrib for e in root])
-    for name in delcols: del d[name]
-    d.to_csv(fname + ".csv", index=False)
+    with stage("xml2csv") as s:
+        tree = ET.parse(fname)
+        root = tree.getroot()
+        d = pd.DataFrame([e.attrib for e in root])
+        for name in delcols: del d[name]
+        tmp_name = fname + ".csv.tmp"
+        try:
+            d.to_csv(tmp_name, index=False)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        os.replace(tmp_name, fname + ".csv")
+        s.rows = d.shape[0]
+
+
+def iter_rows(fname):
+    """
+    Funkcja iteruje po atrybutach elementów row pliku XML bez wczytywania całego drzewa.
+    Przetworzone elementy są czyszczone i usuwane z korzenia, więc zużycie pamięci jest stałe.
+    """
+    context = ET.iterparse(fname, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == "row":
+            yield elem.attrib
+            elem.clear()
+            root.clear()
+
+
+def table_schema(fname, delcols=[]):
+    """
+    Funkcja zwraca schemat pyarrow dla tabeli z pliku fname bez kolumn delcols.
+    Dla tabel z SCHEMAS atrybuty spoza schematu są pomijane. Dla pozostałych tabel kolumny 
+    są wyznaczane dodatkowym strumieniowym przejściem pliku i mają typ tekstowy.
+    """
+    import pyarrow as pa
+    table = os.path.basename(fname).split(".")[0]
+    if table in SCHEMAS:
+        fields = SCHEMAS[table]
+    else:
+        names = {}
+        for attrib in iter_rows(fname):
+            names.update(dict.fromkeys(attrib))
+        fields = [(name, _STR) for name in names]
+    return pa.schema([(name, pa.type_for_alias(typ)) for name, typ in fields if name not in delcols])
+
+
+def _rows_to_table(columns, schema):
+    """Funkcja tworzy tabelę pyarrow z kolumn tekstowych, rzutując je na typy ze schematu."""
+    import pyarrow as pa
+    arrays = [pa.array(columns[field.name], type=_STR).cast(field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+@profile_stage("xml2columnar")
+def xml2columnar(fname, delcols=[], fmt="parquet", batch_size=BATCH_SIZE, compression="zstd"):
+    """
+    Funkcja konwertuje zbiór XML do skompresowanego formatu kolumnowego (Parquet lub Feather)
+    z typowanymi kolumnami. Plik jest czytany strumieniowo przez iterparse, kolumny delcols
+    są pomijane już podczas parsowania, a dane zapisywane są partiami po batch_size wierszy,
+    więc zużycie pamięci nie zależy od rozmiaru zrzutu.
+    Wynik zapisywany jest do pliku fname + ".parquet" lub fname + ".feather". Dane trafiają 
+    najpierw do pliku tymczasowego, który zastępuje plik wynikowy dopiero po zapisaniu ostatniej
+    partii, więc błąd w trakcie konwersji nie pozostawia niepełnego pliku wynikowego.
+    """
+    if fmt not in ("parquet", "feather"):
+        raise ValueError("Nieznany format {0}, dostępne formaty to parquet i feather.".format(fmt))
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = table_schema(fname, delcols)
+    names = schema.names
+    out_name = fname + "." + fmt
+    tmp_name = out_name + ".tmp"
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(tmp_name, schema, compression=compression)
+    else:
+        writer = pa.ipc.new_file(tmp_name, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+    write = writer.write_table
+
+    try:
+        columns = {name: [] for name in names}
+        rows = 0
+        for attrib in iter_rows(fname):
+            for name in names:
+                columns[name].append(attrib.get(name))
+            rows += 1
+            if rows == batch_size:
+                write(_rows_to_table(columns, schema))
+                columns = {name: [] for name in names}
+                rows = 0
+        if rows > 0:
+            write(_rows_to_table(columns, schema))
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(tmp_name)
+        raise
+    os.replace(tmp_name, out_name)
 
 
 def generate_all_csv(folder):
     """
     Funkcja zapisuje wszystkie osiem tabel z podanego folderu w formacie csv.
     """
-    xml2csv(os.path.join(folder, "Badges.xml"))
-    xml2csv(os.path.join(folder, "PostLinks.xml"))
-    xml2csv(os.path.join(folder, "Posts.xml"), ["Body", "Tags", "OwnerDisplayName", "LastEditorDisplayName"])
-    xml2csv(os.path.join(folder, "Tags.xml"))
-    xml2csv(os.path.join(folder, "Users.xml"), ["AboutMe", "WebsiteUrl", "ProfileImageUrl"])
-    xml2csv(os.path.join(folder, "Votes.xml"))
-    xml2csv(os.path.join(folder, "Comments.xml"), ["Text", "UserDisplayName"])
-    xml2csv(os.path.join(folder, "PostHistory.xml"))
\ No newline at end of file
+    for table, delcols in DELCOLS.items():
+        xml2csv(os.path.join(folder, table + ".xml"), delcols)
+
+
+def generate_all_columnar(folder, fmt="parquet", batch_size=BATCH_SIZE):
+    """
+    Funkcja zapisuje wszystkie osiem tabel z podanego folderu w formacie kolumnowym (zob. xml2columnar()).
+    """
+    for table, delcols in DELCOLS.items():
+        xml2columnar(os.path.join(folder, table + ".xml"), delcols, fmt, batch_size)
+
+
+def output_name(fname, fmt="csv"):
+    """Funkcja zwraca nazwę pliku wynikowego dla zbioru XML fname i formatu fmt."""
+    return fname + "." + fmt
+
+
+def is_up_to_date(fname, fmt="csv"):
+    """
+    Funkcja sprawdza, czy plik wynikowy istnieje i jest nowszy niż źródłowy plik XML.
+    Konwersje zapisują plik wynikowy dopiero po powodzeniu, więc nieudana konwersja nie jest uznawana za aktualną.
+    """
+    out_name = output_name(fname, fmt)
+    return os.path.exists(out_name) and os.path.getmtime(out_name) >= os.path.getmtime(fname)
+
+
+def convert_table(fname, delcols=[], fmt="csv", batch_size=BATCH_SIZE):
+    """
+    Funkcja konwertuje jeden zbiór XML do formatu fmt (csv, parquet lub feather).
+    Konwersja do csv (xml2csv()) wczytuje całe drzewo XML do pamięci, strumieniowo 
+    (ze stałym zużyciem pamięci) przetwarzane są tylko formaty kolumnowe (xml2columnar()).
+    Zwraca czas konwersji w sekundach.
+    """
+    start = time.perf_counter()
+    if fmt == "csv":
+        xml2csv(fname, delcols)
+    else:
+        xml2columnar(fname, delcols, fmt, batch_size)
+    return time.perf_counter() - start
+
+
+def convert_sites(folders, fmt="csv", workers=None, force=False, batch_size=BATCH_SIZE):
+    """
+    Funkcja konwertuje wszystkie tabele ze wszystkich podanych folderów (serwisów) 
+    równolegle w puli procesów o workers procesach (domyślnie liczba procesorów).
+    Tabele, dla których plik wynikowy jest nowszy niż plik XML, są pomijane (chyba że force=True),
+    więc odświeżenie danych przelicza tylko zmienione tabele.
+    Postęp i czas konwersji każdej tabeli są wypisywane na bieżąco.
+    Dla dużych zrzutów zalecany jest format parquet lub feather (zob. convert_table()).
+    Zwraca ramkę danych z kolumnami Site, Table, Status (converted, skipped, missing lub error) i Seconds.
+    """
+    results = []
+    tasks = []
+    for folder in folders:
+        for table, delcols in DELCOLS.items():
+            fname = os.path.join(folder, table + ".xml")
+            if not os.path.exists(fname):
+                results.append((folder, table, "missing", 0.0))
+            elif not force and is_up_to_date(fname, fmt):
+                results.append((folder, table, "skipped", 0.0))
+            else:
+                tasks.append((folder, table, fname, delcols))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(convert_table, fname, delcols, fmt, batch_size): (folder, table)
+                   for folder, table, fname, delcols in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            folder, table = futures[future]
+            try:
+                seconds = future.result()
+                results.append((folder, table, "converted", seconds))
+                print("[{0}/{1}] {2}/{3}: {4:.2f} s".format(done, len(tasks), folder, table, seconds))
+            except Exception as e:
+                results.append((folder, table, "error", 0.0))
+                print("[{0}/{1}] {2}/{3}: błąd {4}".format(done, len(tasks), folder, table, e))
+
+    return pd.DataFrame(results, columns=["Site", "Table", "Status", "Seconds"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Konwersja zrzutów Stack Exchange z XML.")
+    parser.add_argument("folders", nargs="+", help="foldery serwisów z plikami XML")
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet", "feather"],
+                        help="format wynikowy (csv wczytuje cały plik XML do pamięci, parquet i feather są strumieniowe)")
+    parser.add_argument("--workers", type=int, default=None, help="liczba procesów")
+    parser.add_argument("--force", action="store_true", help="konwersja także aktualnych tabel")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="liczba wierszy w partii")
+    args = parser.parse_args()
+    summary = convert_sites(args.folders, args.format, args.workers, args.force, args.batch_size)
+    print(summary.to_string(index=False))
@@ -1,40 +1,18 @@
 import os
+import argparse
 import pandas as pd
 import numpy as np
 import re
-from pyecharts.charts import WordCloud
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pycountry_convert import country_alpha2_to_continent_code, country_name_to_country_alpha2
-from pyecharts.charts import Map, Geo
-from pyecharts import options as opts
 
-collection_name = "poker"
-folder_boardgames = os.path.join("..", "data", collection_name)
+# Serwisy analizowane w projekcie
+COLLECTION_NAMES = ["gaming", "boardgames", "chess", "poker"]
 
-# Wczytanie danych z csv
-Users = pd.read_csv(os.path.join(folder_boardgames, "Users.xml.csv"))
+# Liczba krajów z największą liczbą użytkowników zapisywanych w wyniku
+TOP_COUNTRIES = 20
 
-print("Sprawdzimy ilu użytkowników ma ustawioną lokalizację...")
-location = Users["Location"]
-not_nan = location.count()
-percenage = not_nan / location.shape[0] * 100
-print("Użytkowników tego serwisu jest {}. \nAle tylko {} z nich ma ustawioną lokalizację co daje {:.2f}%"
-      .format(location.shape[0], not_nan, percenage))
-
-print("Odrzucamy wartości z Nan i wyświetlamy początek naszego zbioru:")
-location = location.dropna()
-print(location.head(10))
-
-on_earth = location[location == "Earth"].count()
-print("Mamy {} obywatelów ziemi".format(on_earth))
-
-print("Stworzymy teraz dataset z krajami:")
-country = location.map(lambda x: x.split(', ')[-1])
-country = pd.DataFrame(country.reset_index(drop=True))
-
-country.loc[country["Location"] == "UK", "Location"] = "United Kingdom"
-country.loc[country["Location"] == "USA", "Location"] = "United States"
-
-regex_two_capitals = re.compile("[A-Z]{2}$")
 regex_us = re.compile("United States")
 
 states_id = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DC", "DE", "FL", "GA",
@@ -54,42 +32,83 @@ state_names = ["Alaska", "Alabama", "Arkansas", "American Samoa", "Arizona",
                "South Dakota", "Tennessee", "Texas", "Utah", "Virginia", "Virgin Islands",
                "Vermont", "Washington", "Wisconsin", "West Virginia", "Wyoming"]
 
+# Tablica aliasów: nazwa (lub skrót) z lokalizacji -> nazwa kraju
+country_aliases = {"UK": "United Kingdom", "USA": "United States", "Deutschland": "Germany"}
+country_aliases.update(dict.fromkeys(states_id + state_names, "United States"))
+
 
 def regex_apply_states(val):
-    if val and (
-            bool(regex_two_capitals.match(val) and val in states_id) or regex_us.findall(val) or val in state_names):
+    """Zamiana aliasów kraju oraz stanów USA na nazwę kraju."""
+    if val in country_aliases:
+        return country_aliases[val]
+    if val and regex_us.search(val):
         return 'United States'
-    else:
-        return val
-
-
-country['Location'] = country['Location'].apply(regex_apply_states)
-
-country.loc[country["Location"] == "Deutschland", "Location"] = "Germany"
-
-print("Przygotujmy ładną ramkę daych:")
-
-df = pd.DataFrame(country['Location'].value_counts().reset_index())
-df.columns = ["CountryName", "TotalUsers"]
-
-print("Forever alone:")
-print(df[df.TotalUsers == 1])
-
-df = df.head(20)
+    return val
+
+
+def normalize_location(val):
+    """Wyznaczenie kraju z pojedynczej lokalizacji (ostatni człon po przecinku)."""
+    return regex_apply_states(val.split(', ')[-1])
+
+
+def normalize_locations(location):
+    """
+    Wyznaczenie krajów dla serii lokalizacji. Każda unikalna lokalizacja jest normalizowana raz,
+    a wyniki są przypisywane wierszom przez kategorie.
+    """
+    location = location.astype("category")
+    categories = location.cat.categories
+    countries = pd.Series([normalize_location(val) for val in categories], index=categories)
+    return location.map(countries).astype(object)
+
+
+def read_locations(collection_name):
+    """Wczytanie samej kolumny Location z tabeli Users podanego serwisu."""
+    folder = os.path.join("..", "data", collection_name)
+    return pd.read_csv(os.path.join(folder, "Users.xml.csv"), usecols=["Location"])["Location"]
+
+
+def count_countries(location, verbose=False):
+    """
+    Wyznaczenie liczby użytkowników z każdego kraju na podstawie serii lokalizacji.
+    Dla verbose=True wypisywane są statystyki lokalizacji.
+    """
+    if verbose:
+        print("Sprawdzimy ilu użytkowników ma ustawioną lokalizację...")
+        not_nan = location.count()
+        percenage = not_nan / location.shape[0] * 100
+        print("Użytkowników tego serwisu jest {}. \nAle tylko {} z nich ma ustawioną lokalizację co daje {:.2f}%"
+              .format(location.shape[0], not_nan, percenage))
+
+    location = location.dropna()
+    if verbose:
+        print("Odrzucamy wartości z Nan i wyświetlamy początek naszego zbioru:")
+        print(location.head(10))
+        on_earth = location[location == "Earth"].count()
+        print("Mamy {} obywatelów ziemi".format(on_earth))
+
+    country = normalize_locations(location).reset_index(drop=True)
+    df = pd.DataFrame(country.value_counts().reset_index())
+    df.columns = ["CountryName", "TotalUsers"]
+
+    if verbose:
+        print("Forever alone:")
+        print(df[df.TotalUsers == 1])
+    return df
 
 
-def write_cloud_of_names(df):
+def write_cloud_of_names(df, collection_name, output_folder="."):
     """Wyrenderowanie chmury słownej"""
+    from pyecharts.charts import WordCloud
+
     name = list(df.CountryName)
     value = [int(i / 10) * 100 for i in df.TotalUsers]
     wordcloud = WordCloud()
     wordcloud.add("Popular Countries", list(zip(name, value)), word_size_range=None)
-    wordcloud.render("cloud_{}.html".format(collection_name))
-
-
-write_cloud_of_names(df)
+    wordcloud.render(os.path.join(output_folder, "cloud_{}.html".format(collection_name)))
 
 
+@lru_cache(maxsize=None)
 def get_continent(col):
     """Znalezienie kontynentu dla podanego kraju."""
     try:
@@ -106,17 +125,18 @@ def get_continent(col):
 def get_countries_codes(df):
     """Przypisanie kodów do poszczególnych krajów."""
 
-    df['Codes'] = df['CountryName'].apply(get_continent)
-    df['Country'] = df['Codes'].apply(lambda x: x[0])
-    df['Continet'] = df['Codes'].apply(lambda x: x[1])
+    names = df['CountryName'].unique()
+    codes = pd.Series([get_continent(name) for name in names], index=names)
+    df['Codes'] = df['CountryName'].map(codes)
+    df['Country'] = df['CountryName'].map(codes.str[0])
+    df['Continet'] = df['CountryName'].map(codes.str[1])
     return df
 
 
-df = get_countries_codes(df)
-
-
-def draw_map(dataframe, name):
+def draw_map(dataframe, name, output_folder="."):
     """Wyrenderowanie mapy świata dla podanych krajów i ilości użytkowników."""
+    from pyecharts.charts import Map
+    from pyecharts import options as opts
 
     df1 = dataframe[dataframe.Country != "Unknown"]
 
@@ -159,11 +179,57 @@ def draw_map(dataframe, name):
                                                                                                font_size=13)),
                           legend_opts=opts.LegendOpts(is_show=False))
 
-    map_1.render("map_{0}.html".format(name))
+    map_1.render(os.path.join(output_folder, "map_{0}.html".format(name)))
 
 
-draw_map(df, collection_name)
 
+def prepare_countries_list(collection_name, top=TOP_COUNTRIES, render=False, output_folder=".", verbose=False):
+    """
+    Przygotowanie listy krajów z największą liczbą użytkowników serwisu wraz z kodami krajów 
+    i kontynentów. Wynik zapisywany jest do pliku locations_<serwis>.csv w folderze output_folder.
+    Dla render=True renderowane są również chmura słowna i mapa świata (wymaga pyecharts).
+    Zwraca ramkę danych z wynikiem.
+    """
+    df = count_countries(read_locations(collection_name), verbose).head(top).copy()
+    df = get_countries_codes(df)
+    df.to_csv(os.path.join(output_folder, "locations_{0}.csv".format(collection_name)))
+
+    if render:
+        write_cloud_of_names(df, collection_name, output_folder)
+        draw_map(df, collection_name, output_folder)
+    return df
 
-df.to_csv("locations_{0}.csv".format(collection_name))
 
+def prepare_sites(collection_names=COLLECTION_NAMES, top=TOP_COUNTRIES, render=False, output_folder=".",
+                  workers=1, verbose=False):
+    """
+    Przygotowanie list krajów (zob. prepare_countries_list()) dla wielu serwisów w jednym procesie
+    lub równolegle w puli workers procesów (workers=None oznacza liczbę procesorów).
+    Zwraca słownik: nazwa serwisu -> ramka danych.
+    """
+    if workers == 1:
+        return {name: prepare_countries_list(name, top, render, output_folder, verbose) for name in collection_names}
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(prepare_countries_list, name, top, render, output_folder, verbose): name
+                   for name in collection_names}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return {name: results[name] for name in collection_names}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lista krajów użytkowników serwisów Stack Exchange.")
+    parser.add_argument("sites", nargs="*", default=COLLECTION_NAMES, help="nazwy serwisów (foldery w ../data)")
+    parser.add_argument("--top", type=int, default=TOP_COUNTRIES, help="liczba krajów w wyniku")
+    parser.add_argument("--render", action="store_true", help="renderowanie chmury słownej i mapy (HTML)")
+    parser.add_argument("--output", default=".", help="folder wynikowy")
+    parser.add_argument("--workers", type=int, default=1, help="liczba procesów")
+    parser.add_argument("-v", "--verbose", action="store_true", help="wypisywanie statystyk lokalizacji")
+    args = parser.parse_args()
+
+    results = prepare_sites(args.sites, args.top, args.render, args.output, args.workers, args.verbose)
+    for name, df in results.items():
+        print(name)
+        print(df.to_string())